@@ -2,69 +2,98 @@
 Module for processing TCX files from Google Fit.
 """
 
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 import geopandas as gpd
-from shapely.geometry import LineString, Point
+import numpy as np
+import shapely
 import pandas as pd
+import array
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional
 import pytz
 from ..utils.config import DEFAULT_CRS, MIN_WALK_DURATION, MIN_WALK_DISTANCE
 
+# TCX files use a namespace
+_TCX_NS = 'http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2'
+_NS = {'ns': _TCX_NS}
+_ACTIVITY_TAG = f'{{{_TCX_NS}}}Activity'
+_TRACKPOINT_TAG = f'{{{_TCX_NS}}}Trackpoint'
+
 def parse_tcx_file(file_path: str) -> Optional[Dict]:
     """Parse a TCX file and extract walk data.
-    
+
+    Streams the file with iterparse and frees each Trackpoint element as
+    soon as it has been read, so memory stays constant regardless of how
+    long the recorded walk is.
+
     Args:
         file_path: Path to the TCX file
-        
+
     Returns:
         Dictionary containing walk data or None if parsing fails
     """
     try:
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        
-        # TCX files use a namespace
-        ns = {'ns': 'http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2'}
-        
-        # Get activity type
-        activity = root.find('.//ns:Activity', ns)
-        if activity is None:
-            return None
-            
-        activity_type = activity.get('Sport')
-        if activity_type != 'Walking':
+        # Compact typed buffers instead of per-point Python objects
+        lats = array.array('d')
+        lons = array.array('d')
+        first_time_text = None
+        last_time_text = None
+        current_sport = None
+        saw_walking = False
+
+        for event, elem in ET.iterparse(file_path, events=('start', 'end'),
+                                        tag=(_ACTIVITY_TAG, _TRACKPOINT_TAG)):
+            if elem.tag == _ACTIVITY_TAG:
+                if event == 'start':
+                    # A file can mix Walking with other sports; remember
+                    # the enclosing activity's sport so only its own
+                    # trackpoints are skipped, not the whole file
+                    current_sport = elem.get('Sport')
+                    if current_sport == 'Walking':
+                        saw_walking = True
+                continue
+
+            if event != 'end':
+                continue
+
+            if current_sport == 'Walking':
+                time_text = elem.findtext('ns:Time', namespaces=_NS)
+                lat_text = elem.findtext('ns:Position/ns:LatitudeDegrees', namespaces=_NS)
+                lon_text = elem.findtext('ns:Position/ns:LongitudeDegrees', namespaces=_NS)
+
+                if time_text is not None and lat_text is not None and lon_text is not None:
+                    # Only the first and last timestamps are ever used, so
+                    # keep the raw strings and parse two datetimes at the end
+                    if first_time_text is None:
+                        first_time_text = time_text
+                    last_time_text = time_text
+                    lats.append(float(lat_text))
+                    lons.append(float(lon_text))
+
+            # Release the processed subtree so the parsed document
+            # doesn't accumulate in memory
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+        if not saw_walking:
             return None
-            
-        # Get trackpoints
-        trackpoints = []
-        for trackpoint in root.findall('.//ns:Trackpoint', ns):
-            time = trackpoint.find('ns:Time', ns)
-            position = trackpoint.find('ns:Position', ns)
-            
-            if time is not None and position is not None:
-                lat = position.find('ns:LatitudeDegrees', ns)
-                lon = position.find('ns:LongitudeDegrees', ns)
-                
-                if lat is not None and lon is not None:
-                    trackpoints.append({
-                        'time': datetime.fromisoformat(time.text.replace('Z', '+00:00')),
-                        'lat': float(lat.text),
-                        'lon': float(lon.text)
-                    })
         
-        if len(trackpoints) < 2:
+        if len(lats) < 2:
             return None
-            
-        # Create walk data
-        coords = [(tp['lon'], tp['lat']) for tp in trackpoints]
-        times = [tp['time'] for tp in trackpoints]
-        
+
+        # Build the LineString in a single vectorized call instead of
+        # handing GEOS one coordinate tuple at a time; frombuffer is a
+        # zero-copy view over the typed arrays
+        coords = np.column_stack([np.frombuffer(lons, dtype=np.float64),
+                                  np.frombuffer(lats, dtype=np.float64)])
+
         return {
-            'geometry': LineString(coords),
-            'start_time': times[0],
-            'end_time': times[-1],
+            'geometry': shapely.linestrings(coords),
+            'start_time': datetime.fromisoformat(first_time_text.replace('Z', '+00:00')),
+            'end_time': datetime.fromisoformat(last_time_text.replace('Z', '+00:00')),
             'source_file': Path(file_path).name
         }
         
@@ -81,27 +110,45 @@ def process_tcx_files(directory: str) -> gpd.GeoDataFrame:
     Returns:
         GeoDataFrame containing all valid walks
     """
-    walks = []
     tcx_files = list(Path(directory).glob('*.tcx'))
-    
+
     print(f"Found {len(tcx_files)} TCX files")
-    
-    for file_path in tcx_files:
-        walk_data = parse_tcx_file(str(file_path))
+
+    # Parsing is CPU-bound and each file is independent, so fan out
+    # across cores
+    with ProcessPoolExecutor() as executor:
+        results = executor.map(parse_tcx_file, map(str, tcx_files), chunksize=8)
+
+    # Accumulate parallel columns so the GeoDataFrame is built in one
+    # bulk assignment instead of per-row record detection
+    geometries = []
+    start_times = []
+    end_times = []
+    source_files = []
+
+    for walk_data in results:
         if walk_data is not None:
             # Calculate duration and distance
             duration = (walk_data['end_time'] - walk_data['start_time']).total_seconds()
             distance = walk_data['geometry'].length
-            
+
             # Filter out walks that are too short
             if duration >= MIN_WALK_DURATION and distance >= MIN_WALK_DISTANCE:
-                walks.append(walk_data)
-    
-    if not walks:
+                geometries.append(walk_data['geometry'])
+                start_times.append(walk_data['start_time'])
+                end_times.append(walk_data['end_time'])
+                source_files.append(walk_data['source_file'])
+
+    if not geometries:
         return gpd.GeoDataFrame()
-    
+
     # Create GeoDataFrame
-    gdf = gpd.GeoDataFrame(walks, crs=DEFAULT_CRS)
+    gdf = gpd.GeoDataFrame({
+        'geometry': geometries,
+        'start_time': start_times,
+        'end_time': end_times,
+        'source_file': source_files
+    }, geometry='geometry', crs=DEFAULT_CRS)
     
     print(f"Processed {len(gdf)} valid walks")
     return gdf 
\ No newline at end of file
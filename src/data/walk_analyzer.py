@@ -3,44 +3,81 @@ Module for analyzing walks and detecting transit trips.
 """
 
 import geopandas as gpd
-from shapely.geometry import LineString
+import numpy as np
+import pandas as pd
+import shapely
 from typing import List, Dict, Optional
-from ..utils.config import CITY_PARAMS
-from ..utils.geo_utils import calculate_path_metrics, create_buffer, calculate_coverage
+from ..utils.config import CITY_PARAMS, METRIC_CRS
+
+def _path_metrics_vectorized(walks_gdf: gpd.GeoDataFrame) -> pd.DataFrame:
+    """Compute path metrics for all walks at once.
 
-def is_probable_transit(path: gpd.GeoDataFrame, city: str) -> bool:
-    """Determine if a path is likely a transit trip using city-specific parameters.
-    
     Args:
-        path: GeoDataFrame containing the path
-        city: Name of the city for city-specific parameters
-        
+        walks_gdf: GeoDataFrame containing walks
+
     Returns:
-        True if the path is likely a transit trip, False otherwise
+        DataFrame with duration, path_distance, direct_distance,
+        avg_speed and sinuosity columns aligned with walks_gdf
     """
-    params = CITY_PARAMS[city]
-    metrics = calculate_path_metrics(path, city)
-    
-    if not metrics:
-        return False
-    
-    # Check if path is too long to be walking
-    if metrics['direct_distance'] > params['max_direct_distance']:
-        return True
-    
-    # Check speed - only filter out if significantly above max walking speed
-    if metrics['avg_speed'] > params['max_walking_speed'] * 1.2:  # Allow 20% buffer
-        return True
-    
-    # Check if path is too straight (likely a transit route) - only for longer trips
-    if metrics['direct_distance'] > 2000 and metrics['sinuosity'] < 1.05:
-        return True
-    
-    # Check if path is too slow (likely stopped) - more lenient minimum speed
-    if metrics['avg_speed'] < params['min_walking_speed'] and metrics['direct_distance'] > 500:
-        return True
-    
-    return False
+    walks_metric = walks_gdf.to_crs(METRIC_CRS) if walks_gdf.crs != METRIC_CRS else walks_gdf
+
+    path_distance = walks_metric.geometry.length.to_numpy()
+
+    # Start/end points of every walk from one bulk coordinate extraction
+    coords = shapely.get_coordinates(walks_metric.geometry.values)
+    counts = shapely.get_num_coordinates(walks_metric.geometry.values)
+    ends = np.cumsum(counts) - 1
+    starts = ends - counts + 1
+    direct_distance = np.hypot(coords[ends, 0] - coords[starts, 0],
+                               coords[ends, 1] - coords[starts, 1])
+
+    duration = (pd.to_datetime(walks_gdf['end_time']) -
+                pd.to_datetime(walks_gdf['start_time'])).dt.total_seconds().to_numpy()
+
+    avg_speed = np.divide(path_distance, duration,
+                          out=np.zeros_like(path_distance), where=duration > 0)
+    sinuosity = np.divide(path_distance, direct_distance,
+                          out=np.ones_like(path_distance), where=direct_distance > 0)
+
+    return pd.DataFrame({
+        'duration': duration,
+        'path_distance': path_distance,
+        'direct_distance': direct_distance,
+        'avg_speed': avg_speed,
+        'sinuosity': sinuosity
+    }, index=walks_gdf.index)
+
+def is_probable_transit(walks_gdf: gpd.GeoDataFrame, params) -> np.ndarray:
+    """Flag walks that are likely transit trips using city-specific parameters.
+
+    Args:
+        walks_gdf: GeoDataFrame containing walks
+        params: CityParams record (one entry of CITY_PARAMS)
+
+    Returns:
+        Boolean array, True where a walk is likely a transit trip
+    """
+    metrics = _path_metrics_vectorized(walks_gdf)
+
+    # Hoist the threshold reads so the mask expression works on plain floats
+    max_direct_distance = params.max_direct_distance
+    max_speed_buffered = params.max_walking_speed * 1.2  # Allow 20% buffer
+    min_walking_speed = params.min_walking_speed
+
+    direct = metrics['direct_distance'].to_numpy()
+    speed = metrics['avg_speed'].to_numpy()
+    sinuosity = metrics['sinuosity'].to_numpy()
+
+    return (
+        # Too long to be walking
+        (direct > max_direct_distance) |
+        # Too fast - significantly above max walking speed
+        (speed > max_speed_buffered) |
+        # Too straight (likely a transit route) - only for longer trips
+        ((direct > 2000) & (sinuosity < 1.05)) |
+        # Too slow (likely stopped) - more lenient minimum speed
+        ((speed < min_walking_speed) & (direct > 500))
+    )
 
 def analyze_walks(walks_gdf: gpd.GeoDataFrame, streets_gdf: gpd.GeoDataFrame, city: str) -> Dict:
     """Analyze walks and calculate street coverage.
@@ -53,41 +90,60 @@ def analyze_walks(walks_gdf: gpd.GeoDataFrame, streets_gdf: gpd.GeoDataFrame, ci
     Returns:
         Dictionary containing analysis results
     """
+    # Look up the city parameters once for the whole analysis
+    params = CITY_PARAMS[city]
+
     # Filter out transit trips
-    valid_walks = []
-    for _, walk in walks_gdf.iterrows():
-        walk_df = gpd.GeoDataFrame([walk], crs=walks_gdf.crs)
-        if not is_probable_transit(walk_df, city):
-            valid_walks.append(walk)
-    
-    valid_walks_gdf = gpd.GeoDataFrame(valid_walks, crs=walks_gdf.crs)
+    transit_mask = is_probable_transit(walks_gdf, params)
+    valid_walks_gdf = walks_gdf.loc[~transit_mask]
     print(f"Found {len(valid_walks_gdf)} valid walks out of {len(walks_gdf)} total walks")
-    
-    # Create buffers for valid walks
-    buffer_distance = CITY_PARAMS[city]['buffer_distance']
-    walk_buffers = [create_buffer(walk.geometry, buffer_distance, walks_gdf.crs) 
-                   for walk in valid_walks]
+
+    # Create buffers for all valid walks in one vectorized call,
+    # buffering in the metric CRS so the distance is in meters
+    walk_buffers = (valid_walks_gdf.geometry
+                    .to_crs(METRIC_CRS)
+                    .buffer(params.buffer_distance)
+                    .to_crs(walks_gdf.crs))
     
     # Calculate street coverage
     streets_gdf = streets_gdf.copy()
     streets_gdf['covered'] = False
     streets_gdf['coverage_percent'] = 0.0
+
+    if not walk_buffers.empty:
+        # R-tree over the streets prunes the street x buffer pairs down
+        # to the ones that can actually intersect, then the expensive
+        # GEOS intersection runs only on matched streets
+        buffer_geoms = walk_buffers.to_numpy()
+        tree = shapely.STRtree(streets_gdf.geometry.to_numpy())
+        pairs = tree.query(buffer_geoms, predicate='intersects')
+        matched_pos = np.unique(pairs[1])
+
+        if matched_pos.size > 0:
+            # Dissolve overlapping buffers once; each matched street then
+            # needs a single intersection against the union instead of
+            # one per walk
+            union_buffer = shapely.union_all(buffer_geoms)
+            matched = streets_gdf.index[matched_pos]
+            matched_geoms = streets_gdf.geometry.loc[matched]
+            covered_length = matched_geoms.intersection(union_buffer).length
+            coverage = (covered_length / matched_geoms.length * 100).clip(upper=100.0)
+            streets_gdf.loc[matched, 'coverage_percent'] = coverage
+            streets_gdf.loc[matched, 'covered'] = coverage > 0
     
-    for idx, street in streets_gdf.iterrows():
-        coverage = calculate_coverage(street.geometry, walk_buffers)
-        streets_gdf.loc[idx, 'coverage_percent'] = coverage
-        streets_gdf.loc[idx, 'covered'] = coverage > 0
-    
-    # Calculate overall statistics
-    total_length = streets_gdf.geometry.length.sum()
-    covered_length = streets_gdf[streets_gdf.covered].geometry.length.sum()
+    # Calculate overall statistics from one pass over the lengths and
+    # one materialized covered mask
+    street_lengths = streets_gdf.geometry.length.to_numpy()
+    covered_mask = streets_gdf['covered'].to_numpy()
+    total_length = street_lengths.sum()
+    covered_length = street_lengths[covered_mask].sum()
     coverage_percent = (covered_length / total_length * 100) if total_length > 0 else 0
-    
+
     stats = {
         'total_walks': len(walks_gdf),
         'valid_walks': len(valid_walks_gdf),
         'total_streets': len(streets_gdf),
-        'covered_streets': len(streets_gdf[streets_gdf.covered]),
+        'covered_streets': int(covered_mask.sum()),
         'total_length_km': total_length / 1000,
         'covered_length_km': covered_length / 1000,
         'coverage_percent': coverage_percent
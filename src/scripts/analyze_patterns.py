@@ -4,38 +4,42 @@ Analyze walking patterns to generate insights about walking behavior and routes.
 """
 import os
 import geopandas as gpd
+import orjson
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from collections import defaultdict
 import matplotlib.pyplot as plt
+import shapely
 from shapely.geometry import Point, LineString
 import seaborn as sns
 from matplotlib.colors import LinearSegmentedColormap
 
 def extract_time_info(walks_gdf):
     """Extract temporal information from walks."""
-    time_info = []
-    
-    for idx, row in walks_gdf.iterrows():
-        if hasattr(row, 'timestamps') and len(row.timestamps) > 0:
-            start_time = pd.to_datetime(row.timestamps[0])
-            end_time = pd.to_datetime(row.timestamps[-1])
-            
-            # Extract time components
-            time_info.append({
-                'walk_id': idx,
-                'start_time': start_time,
-                'end_time': end_time,
-                'duration': (end_time - start_time).total_seconds() / 3600,  # hours
-                'day_of_week': start_time.day_name(),
-                'hour_of_day': start_time.hour,
-                'month': start_time.month,
-                'is_weekend': start_time.weekday() >= 5,
-                'metrics': row.metrics if hasattr(row, 'metrics') else None
-            })
-    
-    return pd.DataFrame(time_info)
+    if 'timestamps' not in walks_gdf.columns:
+        return pd.DataFrame()
+
+    walks = walks_gdf[walks_gdf['timestamps'].str.len() > 0]
+    if walks.empty:
+        return pd.DataFrame()
+
+    # Parse first/last timestamp per walk in two vectorized calls, then
+    # derive all time components through the .dt accessor
+    start_times = pd.to_datetime(walks['timestamps'].str[0])
+    end_times = pd.to_datetime(walks['timestamps'].str[-1])
+
+    return pd.DataFrame({
+        'walk_id': walks.index,
+        'start_time': start_times.to_numpy(),
+        'end_time': end_times.to_numpy(),
+        'duration': (end_times - start_times).dt.total_seconds().to_numpy() / 3600,  # hours
+        'day_of_week': start_times.dt.day_name().to_numpy(),
+        'hour_of_day': start_times.dt.hour.to_numpy(),
+        'month': start_times.dt.month.to_numpy(),
+        'is_weekend': (start_times.dt.weekday >= 5).to_numpy(),
+        'metrics': walks['metrics'].to_numpy() if 'metrics' in walks.columns else None
+    })
 
 def analyze_temporal_patterns(time_df):
     """Analyze walking patterns across different time periods."""
@@ -67,21 +71,16 @@ def analyze_route_patterns(walks_gdf):
 
 def identify_common_areas(walks_gdf, grid_size=0.001):
     """Identify frequently visited areas using a grid-based approach."""
-    # Create a grid of points
     bounds = walks_gdf.total_bounds
-    x_grid = np.arange(bounds[0], bounds[2], grid_size)
-    y_grid = np.arange(bounds[1], bounds[3], grid_size)
-    
-    # Count visits to each grid cell
-    grid_counts = defaultdict(int)
-    
-    for idx, row in walks_gdf.iterrows():
-        coords = list(row.geometry.coords)
-        for x, y in coords:
-            grid_x = int((x - bounds[0]) / grid_size)
-            grid_y = int((y - bounds[1]) / grid_size)
-            grid_counts[(grid_x, grid_y)] += 1
-    
+    x_edges = np.arange(bounds[0], bounds[2] + grid_size, grid_size)
+    y_edges = np.arange(bounds[1], bounds[3] + grid_size, grid_size)
+
+    # Bin every GPS point of every walk in one histogram call instead of
+    # incrementing a dict per point
+    coords = shapely.get_coordinates(walks_gdf.geometry.values)
+    grid_counts, _, _ = np.histogram2d(coords[:, 0], coords[:, 1],
+                                       bins=[x_edges, y_edges])
+
     return grid_counts
 
 def plot_temporal_patterns(time_df, output_dir):
@@ -143,18 +142,17 @@ def analyze_walking_patterns(walks_gdf, output_dir='analysis_output'):
         )
     }
     
-    # Save summary to file
-    with open(os.path.join(output_dir, 'walking_summary.txt'), 'w') as f:
-        f.write("Walking Pattern Analysis Summary\n")
-        f.write("===============================\n\n")
-        for key, value in summary.items():
-            f.write(f"{key.replace('_', ' ').title()}: {value:.2f}\n")
+    # Save summary as structured JSON - orjson handles the numpy scalars
+    # from the aggregations directly
+    with open(os.path.join(output_dir, 'walking_summary.json'), 'wb') as f:
+        f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
     
     return summary
 
 if __name__ == "__main__":
-    # Load the filtered walks
-    walks_gdf = gpd.read_file("data/processed_walks.geojson")
+    # Load the processed walks from the GeoParquet sibling that
+    # parse_walks writes next to its GeoJSON output
+    walks_gdf = gpd.read_parquet("data/processed_walks.parquet")
     
     # Run analysis
     summary = analyze_walking_patterns(walks_gdf)
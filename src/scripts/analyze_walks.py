@@ -6,15 +6,18 @@ import os
 import geopandas as gpd
 import pandas as pd
 from datetime import datetime, timedelta
+import shapely
 from shapely.geometry import LineString, Point
 import numpy as np
 from math import radians, sin, cos, sqrt, atan2
+from numba import njit
 
+@njit(fastmath=True, cache=True)
 def haversine_distance(lat1, lon1, lat2, lon2):
     """Calculate distance between two points in kilometers."""
     R = 6371  # Earth's radius in kilometers
 
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
+    lat1, lon1, lat2, lon2 = radians(lat1), radians(lon1), radians(lat2), radians(lon2)
     dlat = lat2 - lat1
     dlon = lon2 - lon1
 
@@ -22,76 +25,76 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * atan2(sqrt(a), sqrt(1-a))
     return R * c
 
-def split_path_into_segments(coords, timestamps, segment_size=5):
-    """Split a path into segments of roughly equal size."""
-    segments = []
-    segment_timestamps = []
-    current_segment = []
-    current_timestamps = []
-    
-    for i, (coord, timestamp) in enumerate(zip(coords, timestamps)):
-        current_segment.append(coord)
-        current_timestamps.append(timestamp)
-        
-        if len(current_segment) >= segment_size:
-            if len(current_segment) >= 2:  # Only keep segments with at least 2 points
-                segments.append(current_segment)
-                segment_timestamps.append(current_timestamps)
-            current_segment = [coord]  # Start new segment with overlap
-            current_timestamps = [timestamp]
-    
-    # Add remaining points if they form a valid segment
-    if len(current_segment) >= 2:
-        segments.append(current_segment)
-        segment_timestamps.append(current_timestamps)
-    
-    return segments, segment_timestamps
+def haversine_vectorized(lonlat_a, lonlat_b):
+    """Elementwise haversine distance in kilometers between two (N, 2) lon/lat arrays."""
+    R = 6371  # Earth's radius in kilometers
+
+    lat1 = np.radians(lonlat_a[:, 1])
+    lat2 = np.radians(lonlat_b[:, 1])
+    dlat = lat2 - lat1
+    dlon = np.radians(lonlat_b[:, 0]) - np.radians(lonlat_a[:, 0])
+
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+    return R * c
+
+def segment_boundaries(num_points, segment_size=5):
+    """Start/end point indices for overlapping segments of a path.
 
-def calculate_segment_metrics(coords, timestamps):
-    """Calculate metrics for a path segment."""
+    Each segment spans segment_size points and starts on the last point
+    of the previous one, matching the old split-with-overlap behavior.
+    """
+    starts = np.arange(0, num_points - 1, segment_size - 1)
+    ends = np.minimum(starts + segment_size - 1, num_points - 1)
+    keep = ends > starts  # Only keep segments with at least 2 points
+    return starts[keep], ends[keep]
+
+def calculate_segment_metrics(coords, timestamps, segment_size=5):
+    """Calculate metrics for all segments of a path in one vectorized pass."""
     if len(coords) < 2:
-        return None
-    
+        return None, None, None
+
     # Parse timestamps if they're strings
     if isinstance(timestamps[0], str):
         timestamps = [datetime.fromisoformat(t.replace('Z', '+00:00')) for t in timestamps]
-    
-    # Calculate direct distance (as the crow flies)
-    start_point = coords[0]
-    end_point = coords[-1]
-    direct_distance = haversine_distance(
-        start_point[1], start_point[0],  # lat, lon
-        end_point[1], end_point[0]
-    )
-    
-    # Calculate actual path distance
-    path_distance = 0
-    for i in range(len(coords)-1):
-        path_distance += haversine_distance(
-            coords[i][1], coords[i][0],
-            coords[i+1][1], coords[i+1][0]
-        )
-    
-    # Calculate duration in hours
-    duration = (timestamps[-1] - timestamps[0]).total_seconds() / 3600
-    
-    # Calculate average speed in km/h
-    avg_speed = path_distance / duration if duration > 0 else 0
-    
-    # Calculate path sinuosity (ratio of path distance to direct distance)
-    sinuosity = path_distance / direct_distance if direct_distance > 0 else 1
-    
-    # Calculate point density (points per kilometer)
-    point_density = len(coords) / path_distance if path_distance > 0 else float('inf')
-    
-    return {
-        'direct_distance': direct_distance,
-        'path_distance': path_distance,
-        'duration_hours': duration,
-        'avg_speed_kmh': avg_speed,
-        'sinuosity': sinuosity,
-        'point_density': point_density
-    }
+
+    lonlat = np.asarray(coords, dtype=np.float64)
+    starts, ends = segment_boundaries(len(coords), segment_size)
+
+    # Consecutive-point distances once for the whole path; per-segment
+    # path distances are then just grouped sums
+    step_distances = haversine_vectorized(lonlat[:-1], lonlat[1:])
+    path_distances = np.add.reduceat(step_distances, starts)
+
+    # Direct distance (as the crow flies) per segment
+    direct_distances = haversine_vectorized(lonlat[starts], lonlat[ends])
+
+    # Duration in hours per segment
+    durations = np.array([
+        (timestamps[e] - timestamps[s]).total_seconds() / 3600
+        for s, e in zip(starts, ends)
+    ])
+
+    # Average speed in km/h, sinuosity and point density per segment
+    avg_speeds = np.divide(path_distances, durations,
+                           out=np.zeros_like(path_distances), where=durations > 0)
+    sinuosities = np.divide(path_distances, direct_distances,
+                            out=np.ones_like(path_distances), where=direct_distances > 0)
+    point_densities = np.divide(ends - starts + 1, path_distances,
+                                out=np.full(len(starts), np.inf), where=path_distances > 0)
+
+    metrics = [
+        {
+            'direct_distance': direct_distances[i],
+            'path_distance': path_distances[i],
+            'duration_hours': durations[i],
+            'avg_speed_kmh': avg_speeds[i],
+            'sinuosity': sinuosities[i],
+            'point_density': point_densities[i]
+        }
+        for i in range(len(starts))
+    ]
+    return starts, ends, metrics
 
 def is_probable_transit_segment(metrics):
     """Determine if a path segment is likely a transit segment."""
@@ -136,27 +139,33 @@ def analyze_walks(walks_gdf):
     
     print("\nAnalyzing paths for transit detection...")
     total_paths = len(walks)
-    
-    for idx, row in walks.iterrows():
+
+    # Pull every path's coordinates out of GEOS in one call; the output
+    # is grouped by geometry, so cumulative point counts give each
+    # path's slice of the shared array in O(1)
+    coords_all = shapely.get_coordinates(walks.geometry.values)
+    counts = shapely.get_num_coordinates(walks.geometry.values)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    for pos, (idx, row) in enumerate(walks.iterrows()):
         if idx % 100 == 0:
             print(f"Processing path {idx}/{total_paths}")
-        
+
         # Get coordinates and timestamps
-        coords = list(row.geometry.coords)
+        coords = coords_all[offsets[pos]:offsets[pos + 1]]
         timestamps = [row.start_time] * len(coords) if not hasattr(row, 'timestamps') else row.timestamps
-        
-        # Split path into segments
-        segments, segment_timestamps = split_path_into_segments(coords, timestamps)
-        
-        # Analyze each segment
-        for segment_coords, seg_timestamps in zip(segments, segment_timestamps):
-            metrics = calculate_segment_metrics(segment_coords, seg_timestamps)
-            
-            if metrics and not is_probable_transit_segment(metrics):
-                # Keep this segment as walking
-                segment_geom = LineString(segment_coords)
+
+        # Compute metrics for every segment of this path at once
+        starts, ends, segment_metrics = calculate_segment_metrics(coords, timestamps)
+        if segment_metrics is None:
+            continue
+
+        # Keep the segments that look like walking
+        for s, e, metrics in zip(starts, ends, segment_metrics):
+            if not is_probable_transit_segment(metrics):
+                segment_geom = LineString(coords[s:e + 1])
                 walking_segments.append(segment_geom)
-                
+
                 # Keep relevant properties
                 props = row.to_dict()
                 props.pop('geometry')  # Remove geometry as we'll add it back
@@ -175,8 +184,8 @@ def analyze_walks(walks_gdf):
         walks_filtered = gpd.GeoDataFrame([], geometry=[], crs=walks_gdf.crs)
     
     # Print summary
-    total_segments = sum(len(list(geom.coords)) - 1 for geom in walks_gdf.geometry)
-    kept_segments = sum(len(list(geom.coords)) - 1 for geom in walks_filtered.geometry)
+    total_segments = int(shapely.get_num_coordinates(walks_gdf.geometry.values).sum()) - len(walks_gdf)
+    kept_segments = int(shapely.get_num_coordinates(walks_filtered.geometry.values).sum()) - len(walks_filtered)
     
     print("\nAnalysis Summary:")
     print(f"Total path segments: {total_segments}")
@@ -197,7 +206,8 @@ if __name__ == "__main__":
     # Analyze and filter walks
     walks_filtered = analyze_walks(walks_gdf)
     
-    # Save filtered walks
-    output_file = os.path.join("data", "filtered_walks.geojson")
-    walks_filtered.to_file(output_file, driver='GeoJSON')
+    # Save filtered walks as GeoParquet - much faster to re-read than
+    # GeoJSON for downstream analysis steps
+    output_file = os.path.join("data", "filtered_walks.parquet")
+    walks_filtered.to_parquet(output_file, compression='zstd')
     print(f"\nSaved filtered walks to {output_file}") 
\ No newline at end of file
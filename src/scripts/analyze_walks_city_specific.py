@@ -5,11 +5,14 @@ Analyze walking data with city-specific parameters.
 import os
 import geopandas as gpd
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from export_analyzed_data import export
+import math
 import numpy as np
+import shapely
+from numba import njit, prange
 from shapely.geometry import LineString, Point
-from shapely.ops import nearest_points
-import math
 
 # City-specific parameters
 CITY_PARAMS = {
@@ -36,90 +39,128 @@ CITY_PARAMS = {
     }
 }
 
-def calculate_path_metrics(path, city):
-    """Calculate metrics for a path with city-specific parameters."""
+@njit(parallel=True, fastmath=True, cache=True)
+def _walk_metrics(coords, starts, counts, out_path, out_direct):
+    """Per-walk path and direct distances over one flat coordinate array."""
+    for i in prange(starts.size):
+        s = starts[i]
+        n = counts[i]
+        acc = 0.0
+        for j in range(n - 1):
+            dx = coords[s + j + 1, 0] - coords[s + j, 0]
+            dy = coords[s + j + 1, 1] - coords[s + j, 1]
+            acc += math.sqrt(dx * dx + dy * dy)
+        out_path[i] = acc
+        dx = coords[s + n - 1, 0] - coords[s, 0]
+        dy = coords[s + n - 1, 1] - coords[s, 1]
+        out_direct[i] = math.sqrt(dx * dx + dy * dy)
+
+def calculate_path_metrics(walks_gdf, city, durations=None):
+    """Calculate metrics for every walk in one vectorized pass.
+
+    Accepts precomputed durations (seconds) so callers that have already
+    parsed the timestamp columns don't pay for a second conversion.
+    """
     params = CITY_PARAMS[city]
-    
-    # Parse timestamps
-    try:
-        start_time = pd.to_datetime(path['start_time'])
-        end_time = pd.to_datetime(path['end_time'])
-    except:
-        print(f"Error parsing timestamps for path: {path.get('source_file', 'unknown')}")
-        return None
-    
-    # Calculate duration in seconds
-    duration = (end_time - start_time).total_seconds()
-    
-    # Get coordinates
-    coords = list(path['geometry'].coords)
-    if len(coords) < 2:
-        return None
-    
-    # Calculate direct distance (straight line between start and end)
-    start_point = Point(coords[0])
-    end_point = Point(coords[-1])
-    direct_distance = start_point.distance(end_point)
-    
-    # Calculate path distance (sum of distances between consecutive points)
-    path_distance = 0
-    for i in range(len(coords) - 1):
-        p1 = Point(coords[i])
-        p2 = Point(coords[i + 1])
-        path_distance += p1.distance(p2)
-    
-    # Calculate average speed (m/s)
-    if duration > 0:
-        avg_speed = path_distance / duration
+
+    if durations is None:
+        # Parse both timestamp columns once for the whole frame
+        try:
+            start_times = pd.to_datetime(walks_gdf['start_time'])
+            end_times = pd.to_datetime(walks_gdf['end_time'])
+        except (ValueError, TypeError) as e:
+            print(f"Error parsing timestamps for walks: {e}")
+            return None
+        duration = (end_times - start_times).dt.total_seconds().to_numpy()
     else:
-        avg_speed = 0
-    
+        duration = np.asarray(durations, dtype=np.float64)
+
+    # Pull every walk's coordinates out of GEOS at once; walks are
+    # delimited by their cumulative point counts
+    geoms = walks_gdf.geometry.values
+    coords = shapely.get_coordinates(geoms)
+    counts = shapely.get_num_coordinates(geoms)
+    starts = np.cumsum(counts) - counts
+
+    # Path and direct distances come out of one JIT-compiled kernel that
+    # walks the flat coordinate array without NumPy temporaries
+    path_distance = np.empty(counts.size)
+    direct_distance = np.empty(counts.size)
+    _walk_metrics(coords, starts, counts, path_distance, direct_distance)
+
+    # Calculate average speed (m/s)
+    avg_speed = np.divide(path_distance, duration,
+                          out=np.zeros_like(path_distance), where=duration > 0)
+
     # Calculate sinuosity (path length / direct distance)
-    if direct_distance > 0:
-        sinuosity = path_distance / direct_distance
-    else:
-        sinuosity = 1
-    
-    return {
+    sinuosity = np.divide(path_distance, direct_distance,
+                          out=np.ones_like(path_distance), where=direct_distance > 0)
+
+    return pd.DataFrame({
         'direct_distance': direct_distance,
         'path_distance': path_distance,
         'duration': duration,
         'avg_speed': avg_speed,
         'sinuosity': sinuosity
-    }
+    }, index=walks_gdf.index)
+
+def is_probable_transit(walks_gdf, city, durations=None):
+    """Flag walks that are likely transit trips using city-specific parameters.
 
-def is_probable_transit(path, city):
-    """Determine if a path is likely a transit trip using city-specific parameters."""
+    Returns a boolean array aligned with walks_gdf, True where a walk is
+    likely a transit trip.
+    """
     params = CITY_PARAMS[city]
-    metrics = calculate_path_metrics(path, city)
-    
-    if not metrics:
-        return False
-    
-    # Check if path is too long to be walking
-    if metrics['direct_distance'] > params['max_direct_distance']:
-        return True
-    
-    # Check speed - only filter out if significantly above max walking speed
-    if metrics['avg_speed'] > params['max_walking_speed'] * 1.2:  # Allow 20% buffer
-        return True
-    
-    # Check if path is too straight (likely a transit route) - only for longer trips
-    if metrics['direct_distance'] > 2000 and metrics['sinuosity'] < 1.05:
-        return True
-    
-    # Check if path is too slow (likely stopped) - more lenient minimum speed
-    if metrics['avg_speed'] < params['min_walking_speed'] and metrics['direct_distance'] > 500:
-        return True
-    
-    return False
+    metrics = calculate_path_metrics(walks_gdf, city, durations=durations)
+
+    if metrics is None:
+        return np.zeros(len(walks_gdf), dtype=bool)
+
+    direct = metrics['direct_distance'].to_numpy()
+    speed = metrics['avg_speed'].to_numpy()
+    sinuosity = metrics['sinuosity'].to_numpy()
+
+    return (
+        # Too long to be walking
+        (direct > params['max_direct_distance']) |
+        # Too fast - significantly above max walking speed (20% buffer)
+        (speed > params['max_walking_speed'] * 1.2) |
+        # Too straight (likely a transit route) - only for longer trips
+        ((direct > 2000) & (sinuosity < 1.05)) |
+        # Too slow (likely stopped) - more lenient minimum speed
+        ((speed < params['min_walking_speed']) & (direct > 500))
+    )
 
 def analyze_walks(walks_gdf, streets_gdf, city):
     """Analyze walks and update street coverage with city-specific parameters."""
     params = CITY_PARAMS[city]
-    
-    # Create a copy of streets to avoid modifying the original
-    streets = streets_gdf.copy()
+
+    # Reproject everything to the city's UTM zone once so distances,
+    # speeds and buffers below are all in meters rather than degrees;
+    # the input CRSes are kept so the results go back out in lon/lat
+    walks_crs = walks_gdf.crs
+    streets_crs = streets_gdf.crs
+    utm = walks_gdf.estimate_utm_crs()
+    walks_gdf = walks_gdf.to_crs(utm)
+    streets_gdf = streets_gdf.to_crs(utm)
+
+    # Drop street vertices that are redundant at ~1 m tolerance; buffer
+    # and intersection cost is linear in vertex count. Walks are
+    # simplified later, only for the buffer stage, so the transit filter
+    # below still sees the original paths
+    streets_gdf = streets_gdf.copy()
+    streets_gdf['geometry'] = shapely.simplify(
+        streets_gdf.geometry.to_numpy(), tolerance=1.0,
+        preserve_topology=False)
+
+    # Shallow copy: only the two coverage columns are (re)assigned below,
+    # so the geometry objects don't need to be duplicated
+    streets = streets_gdf.copy(deep=False)
+
+    # Street lengths in meters, computed once for the whole network and
+    # persisted with the frame so downstream steps don't recompute them
+    street_lengths = shapely.length(streets.geometry.values)
+    streets['length_m'] = street_lengths
     
     # Initialize coverage columns if they don't exist
     if 'covered' not in streets.columns:
@@ -127,78 +168,107 @@ def analyze_walks(walks_gdf, streets_gdf, city):
     if 'coverage_percent' not in streets.columns:
         streets['coverage_percent'] = 0.0
     
-    # Filter out probable transit trips
-    valid_geometries = []
-    valid_attributes = []
-    for _, walk in walks_gdf.iterrows():
-        if not is_probable_transit(walk, city):
-            valid_geometries.append(walk.geometry)
-            valid_attributes.append({
-                'start_time': walk.start_time,
-                'end_time': walk.end_time,
-                'source_file': walk.source_file
-            })
-    
-    # Create GeoDataFrame from valid walks
-    valid_walks_gdf = gpd.GeoDataFrame(
-        valid_attributes,
-        geometry=valid_geometries,
-        crs=walks_gdf.crs
-    )
-    
+    # Parse the timestamp columns once up front and hand the durations
+    # to the transit detection
+    start_times = pd.to_datetime(walks_gdf['start_time'])
+    end_times = pd.to_datetime(walks_gdf['end_time'])
+    durations = (end_times - start_times).dt.total_seconds().to_numpy()
+
+    # Filter out probable transit trips in one vectorized pass; the mask
+    # selection slices columns without rebuilding the frame row by row
+    transit_mask = is_probable_transit(walks_gdf, city, durations=durations)
+    valid_walks_gdf = walks_gdf.loc[
+        ~transit_mask, ['start_time', 'end_time', 'source_file', 'geometry']
+    ].reset_index(drop=True)
+
     print(f"Found {len(valid_walks_gdf)} valid walks out of {len(walks_gdf)} total walks")
     
-    # Update street coverage
-    for _, street in streets.iterrows():
-        street_geom = street.geometry
-        covered_length = 0
-        
-        for _, walk in valid_walks_gdf.iterrows():
-            walk_geom = walk.geometry
-            buffered_walk = walk_geom.buffer(params['buffer_distance'])
-            
-            # Calculate intersection length
-            intersection = street_geom.intersection(buffered_walk)
-            if not intersection.is_empty:
-                covered_length += intersection.length
-        
-        # Calculate coverage percentage
-        if street_geom.length > 0:
-            coverage_percent = (covered_length / street_geom.length) * 100
-            streets.loc[street.name, 'coverage_percent'] = min(coverage_percent, 100)
-            streets.loc[street.name, 'covered'] = coverage_percent > 0
-    
-    return streets, valid_walks_gdf
+    # Buffer every valid walk once, then use an R-tree over the buffers
+    # so each street is only intersected with the walks that can
+    # actually touch it
+    # Simplify only the copies fed into the buffer — a vertex dropped at
+    # half the buffer tolerance can't change what the buffer covers, but
+    # it would change the path lengths the transit filter just measured
+    # quad_segs=4 halves the vertex count per buffer versus the default,
+    # which is plenty of precision for a buffer this small and roughly
+    # halves the downstream intersection cost
+    simplified_walks = shapely.simplify(valid_walks_gdf.geometry.to_numpy(),
+                                        tolerance=params['buffer_distance'] / 2,
+                                        preserve_topology=False)
+    buffers = shapely.buffer(simplified_walks,
+                             params['buffer_distance'], quad_segs=4)
+    street_geoms = streets.geometry.values
+
+    if len(buffers) > 0:
+        # Prepare the buffers so the repeated intersects tests against
+        # many streets reuse GEOS' cached segment index
+        shapely.prepare(buffers)
+        tree = shapely.STRtree(buffers)
+        street_idx, buffer_idx = tree.query(street_geoms, predicate='intersects')
+
+        if street_idx.size > 0:
+            # Intersection lengths for all candidate pairs at once via
+            # the shapely ufuncs, summed per street with bincount
+            pair_lengths = shapely.length(
+                shapely.intersection(street_geoms[street_idx], buffers[buffer_idx]))
+            covered_length = np.bincount(street_idx, weights=pair_lengths,
+                                         minlength=len(streets))
+
+            # Calculate coverage percentages and write both columns in
+            # one bulk assignment instead of per-street .loc writes
+            safe_lengths = np.where(street_lengths > 0, street_lengths, 1.0)
+            coverage = np.where(street_lengths > 0,
+                                np.minimum(covered_length / safe_lengths * 100, 100),
+                                0.0)
+            streets['coverage_percent'] = coverage
+            streets['covered'] = coverage > 0
+
+    # All the metric math is done; hand the frames back in the CRSes
+    # they came in with, since the GeoJSON/Kepler exports downstream
+    # need WGS84 lon/lat, not UTM meters
+    return streets.to_crs(streets_crs), valid_walks_gdf.to_crs(walks_crs)
+
+def process_city(city):
+    """Run the full analysis for one city and write its outputs."""
+    print(f"\nAnalyzing walks for {city.capitalize()}...")
+
+    # Load walks and streets
+    walks_file = f"data/{city}_walks.geojson"
+    streets_file = f"data/{city}_streets.geojson"
+
+    if not os.path.exists(walks_file) or not os.path.exists(streets_file):
+        print(f"Missing data files for {city}")
+        return
+
+    walks_gdf = gpd.read_file(walks_file, engine='pyogrio')
+    streets_gdf = gpd.read_file(streets_file, engine='pyogrio')
+
+    # Analyze walks
+    updated_streets, valid_walks = analyze_walks(walks_gdf, streets_gdf, city)
+
+    # Save results
+    output_dir = f"data/{city}_analyzed"
+    os.makedirs(output_dir, exist_ok=True)
+
+    # GeoParquet intermediates: binary columnar storage, so the
+    # downstream export step skips JSON parsing entirely
+    updated_streets.to_parquet(f"{output_dir}/streets.parquet")
+    valid_walks.to_parquet(f"{output_dir}/valid_walks.parquet")
+
+    # Export for Kepler straight from memory, skipping the re-read of
+    # the intermediates
+    export(updated_streets, valid_walks, f"kepler_data_{city}", city=city)
+
+    print(f"Analysis complete for {city}")
+    print(f"Total walks: {len(walks_gdf)}")
+    print(f"Valid walks: {len(valid_walks)}")
+    print(f"Covered streets: {updated_streets['covered'].sum()}")
 
 if __name__ == "__main__":
-    # Test the analysis for each city
+    # Each city is independent, so run them in parallel; keep the numeric
+    # libraries single-threaded per worker to avoid oversubscription
+    os.environ.setdefault('OMP_NUM_THREADS', '1')
+
     cities = ['london', 'blacksburg', 'mumbai']
-    
-    for city in cities:
-        print(f"\nAnalyzing walks for {city.capitalize()}...")
-        
-        # Load walks and streets
-        walks_file = f"data/{city}_walks.geojson"
-        streets_file = f"data/{city}_streets.geojson"
-        
-        if not os.path.exists(walks_file) or not os.path.exists(streets_file):
-            print(f"Missing data files for {city}")
-            continue
-        
-        walks_gdf = gpd.read_file(walks_file)
-        streets_gdf = gpd.read_file(streets_file)
-        
-        # Analyze walks
-        updated_streets, valid_walks = analyze_walks(walks_gdf, streets_gdf, city)
-        
-        # Save results
-        output_dir = f"data/{city}_analyzed"
-        os.makedirs(output_dir, exist_ok=True)
-        
-        updated_streets.to_file(f"{output_dir}/streets.geojson", driver='GeoJSON')
-        valid_walks.to_file(f"{output_dir}/valid_walks.geojson", driver='GeoJSON')
-        
-        print(f"Analysis complete for {city}")
-        print(f"Total walks: {len(walks_gdf)}")
-        print(f"Valid walks: {len(valid_walks)}")
-        print(f"Covered streets: {updated_streets['covered'].sum()}") 
\ No newline at end of file
+    with ProcessPoolExecutor(max_workers=len(cities)) as executor:
+        list(executor.map(process_city, cities))
\ No newline at end of file
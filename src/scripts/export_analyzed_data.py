@@ -1,81 +1,106 @@
 #!/usr/bin/env python3
 """
-Export analyzed walking data for Kepler.gl visualization.
+Shared export of analyzed walking data for Kepler.gl visualization.
 """
 import os
 import geopandas as gpd
 import pandas as pd
 
 def add_style_properties(gdf, style_type):
-    """Add style properties to the GeoDataFrame."""
+    """Add style properties to the GeoDataFrame.
+
+    String columns are single-category categoricals, so the constant is
+    stored once instead of as N identical object references.
+    """
     if style_type == 'covered_street':
-        gdf['stroke'] = '#FFD700'  # Gold color
+        gdf['stroke'] = pd.Categorical(['#FFD700'] * len(gdf))  # Gold color
         gdf['stroke-width'] = 3
         gdf['stroke-opacity'] = 1
     elif style_type == 'uncovered_street':
-        gdf['stroke'] = '#4A5568'  # Gray color
+        gdf['stroke'] = pd.Categorical(['#4A5568'] * len(gdf))  # Gray color
         gdf['stroke-width'] = 1
         gdf['stroke-opacity'] = 0.6
     elif style_type == 'walk':
-        gdf['stroke'] = '#3182CE'  # Blue color
+        gdf['stroke'] = pd.Categorical(['#3182CE'] * len(gdf))  # Blue color
         gdf['stroke-width'] = 2
         gdf['stroke-opacity'] = 0.8
     return gdf
 
-def export_for_kepler(city):
-    """Export analyzed data for a specific city."""
-    # Create output directory
-    output_dir = f"kepler_data_{city}"
+def export(streets_gdf, walks_gdf, output_dir, city=None):
+    """Export in-memory streets and walks as styled Kepler.gl GeoJSON.
+
+    This is the single implementation of the split-covered/uncovered,
+    add-style, write-file sequence that used to be copied across the
+    per-city export scripts. Passing the GeoDataFrames directly avoids
+    re-reading them from disk.
+
+    Parameters:
+    -----------
+    streets_gdf : geopandas.GeoDataFrame or None
+        Streets with coverage information
+    walks_gdf : geopandas.GeoDataFrame or None
+        Valid walks as LineStrings
+    output_dir : str
+        Directory to save the exported files
+    city : str, optional
+        City name used to prefix the output file names
+    """
     os.makedirs(output_dir, exist_ok=True)
-    
-    # Load analyzed data
-    analyzed_dir = f"data/{city}_analyzed"
-    streets_file = f"{analyzed_dir}/streets.geojson"
-    walks_file = f"{analyzed_dir}/valid_walks.geojson"
-    
-    if not os.path.exists(streets_file) or not os.path.exists(walks_file):
-        print(f"Missing analyzed data files for {city}")
-        return
-    
-    streets_gdf = gpd.read_file(streets_file)
-    walks_gdf = gpd.read_file(walks_file)
-    
+    prefix = f"{city}_" if city else ""
+
     # Export streets
-    if not streets_gdf.empty:
+    if streets_gdf is not None and not streets_gdf.empty:
         # Split streets into covered and uncovered
         covered_streets = streets_gdf[streets_gdf['covered']].copy()
         uncovered_streets = streets_gdf[~streets_gdf['covered']].copy()
-        
+
         # Export covered streets
         if not covered_streets.empty:
-            covered_streets['data_type'] = 'covered_street'
+            covered_streets['data_type'] = pd.Categorical(['covered_street'] * len(covered_streets))
             covered_streets['coverage_percent'] = covered_streets['coverage_percent'].fillna(0)
             covered_streets = add_style_properties(covered_streets, 'covered_street')
-            covered_file = os.path.join(output_dir, f"{city}_covered_streets.geojson")
-            covered_streets.to_file(covered_file, driver='GeoJSON')
+            covered_file = os.path.join(output_dir, f"{prefix}covered_streets.geojson")
+            covered_streets.to_file(covered_file, driver='GeoJSON', engine='pyogrio')
             print(f"Covered streets exported to {covered_file}")
-        
+
         # Export uncovered streets
         if not uncovered_streets.empty:
-            uncovered_streets['data_type'] = 'uncovered_street'
+            uncovered_streets['data_type'] = pd.Categorical(['uncovered_street'] * len(uncovered_streets))
             uncovered_streets['coverage_percent'] = 0
             uncovered_streets = add_style_properties(uncovered_streets, 'uncovered_street')
-            uncovered_file = os.path.join(output_dir, f"{city}_uncovered_streets.geojson")
-            uncovered_streets.to_file(uncovered_file, driver='GeoJSON')
+            uncovered_file = os.path.join(output_dir, f"{prefix}uncovered_streets.geojson")
+            uncovered_streets.to_file(uncovered_file, driver='GeoJSON', engine='pyogrio')
             print(f"Uncovered streets exported to {uncovered_file}")
-    
+
     # Export walks
-    if not walks_gdf.empty:
-        walks_gdf['data_type'] = 'walk'
-        walks_gdf = add_style_properties(walks_gdf, 'walk')
-        walks_file = os.path.join(output_dir, f"{city}_walks.geojson")
-        walks_gdf.to_file(walks_file, driver='GeoJSON')
+    if walks_gdf is not None and not walks_gdf.empty:
+        walks = walks_gdf.copy()
+        walks['data_type'] = pd.Categorical(['walk'] * len(walks))
+        walks = add_style_properties(walks, 'walk')
+        walks_file = os.path.join(output_dir, f"{prefix}walks.geojson")
+        walks.to_file(walks_file, driver='GeoJSON', engine='pyogrio')
         print(f"Walks exported to {walks_file}")
 
+def export_for_kepler(city):
+    """Export analyzed data for a specific city from its Parquet intermediates."""
+    # Load analyzed data from the GeoParquet intermediates
+    analyzed_dir = f"data/{city}_analyzed"
+    streets_file = f"{analyzed_dir}/streets.parquet"
+    walks_file = f"{analyzed_dir}/valid_walks.parquet"
+
+    if not os.path.exists(streets_file) or not os.path.exists(walks_file):
+        print(f"Missing analyzed data files for {city}")
+        return
+
+    streets_gdf = gpd.read_parquet(streets_file)
+    walks_gdf = gpd.read_parquet(walks_file)
+
+    export(streets_gdf, walks_gdf, f"kepler_data_{city}", city=city)
+
 if __name__ == "__main__":
     # Export data for each city
     cities = ['london', 'blacksburg', 'mumbai']
-    
+
     for city in cities:
         print(f"\nExporting data for {city.capitalize()}...")
-        export_for_kepler(city) 
\ No newline at end of file
+        export_for_kepler(city)
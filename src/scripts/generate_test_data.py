@@ -3,17 +3,52 @@
 Generate fake GPX data for testing the Street Tracker application.
 This script creates synthetic walking routes in a specified city area.
 """
+import json
+import math
 import os
 import random
-import gpxpy
-import gpxpy.gpx
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 import numpy as np
 import osmnx as ox
+from lxml import etree
+from numba import njit
 import geopandas as gpd
 from shapely.geometry import Point, LineString
 import argparse
 
+# Cache Overpass responses on disk so repeated runs skip the download
+ox.settings.use_cache = True
+
+# One PCG64 generator shared by the whole module; array draws come from
+# a single C call and scalar draws skip the Mersenne Twister overhead
+_RNG = np.random.default_rng()
+
+@lru_cache(maxsize=32)
+def _city_centroid(city_name):
+    """Return the (lat, lon) centroid of a city, geocoding at most once.
+
+    The result is memoized for the process and persisted to a small JSON
+    file, so repeated script runs skip the Nominatim round-trip entirely.
+    """
+    slug = city_name.lower().replace(',', '').replace(' ', '_')
+    cache_file = os.path.join("data", f"centroid_{slug}.json")
+
+    if os.path.exists(cache_file):
+        with open(cache_file) as f:
+            cached = json.load(f)
+        return cached['lat'], cached['lon']
+
+    gdf = ox.geocode_to_gdf(city_name)
+    center_point = gdf.geometry.centroid.iloc[0]
+
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    with open(cache_file, 'w') as f:
+        json.dump({'lat': center_point.y, 'lon': center_point.x}, f)
+
+    return center_point.y, center_point.x
+
 def generate_random_walk(center_lat, center_lon, 
                         min_points=100, max_points=500,
                         max_distance=0.01, # ~1km at equator
@@ -39,223 +74,313 @@ def generate_random_walk(center_lat, center_lon,
     """
     if start_time is None:
         start_time = datetime.now() - timedelta(days=random.randint(1, 30))
-    
-    num_points = random.randint(min_points, max_points)
-    
-    # Generate a random walk
-    points = []
-    current_lat = center_lat
-    current_lon = center_lon
-    current_time = start_time
-    
-    for i in range(num_points):
-        # Add some noise to create a walking path
-        # This creates a random walk with some directional persistence
-        if i > 0 and i % 20 == 0:
-            # Occasionally make bigger direction changes to simulate turns
-            delta_lat = random.uniform(-0.0003, 0.0003)
-            delta_lon = random.uniform(-0.0003, 0.0003)
-        else:
-            # Smaller changes for a more natural path
-            delta_lat = random.uniform(-0.0001, 0.0001)
-            delta_lon = random.uniform(-0.0001, 0.0001)
-        
-        # Keep within bounds
-        if abs(current_lat - center_lat) > max_distance:
-            delta_lat = -delta_lat * 1.5  # Reverse direction and move faster
-        if abs(current_lon - center_lon) > max_distance:
-            delta_lon = -delta_lon * 1.5  # Reverse direction and move faster
-        
-        current_lat += delta_lat
-        current_lon += delta_lon
-        
-        # Human walking speed varies, but typically 4-5 km/h = ~1.1-1.4 m/s
-        # Time increment should be consistent with distance moved
-        # 0.0001 degrees is roughly 10m at the equator
-        distance_moved = ((delta_lat**2 + delta_lon**2) ** 0.5) * 111000  # rough conversion to meters
-        time_increment = timedelta(seconds=max(1, int(distance_moved / 1.2)))  # assuming 1.2 m/s walking speed
-        current_time += time_increment
-        
-        # Random elevation between 0 and 100m, with some continuity
-        if i == 0:
-            elevation = random.uniform(0, 100)
+
+    num_points = int(_RNG.integers(min_points, max_points + 1))
+
+    # Draw every step at once; every 20th step gets a 3x bigger delta to
+    # simulate turns, giving the path some directional variety
+    deltas = _RNG.uniform(-0.0001, 0.0001, (num_points, 2))
+    turn_mask = np.arange(num_points) % 20 == 0
+    turn_mask[0] = False
+    deltas[turn_mask] *= 3
+
+    # Accumulate offsets as int32 tenth-microdegrees: half the cumsum
+    # buffer of float64, denser SIMD lanes, and the bound check becomes
+    # a branchless select instead of per-step conditionals
+    SCALE = 10_000_000  # 1e-7 degree resolution
+    offsets = np.cumsum((deltas * SCALE).astype(np.int32), axis=0, dtype=np.int32)
+    bound = np.int32(max_distance * SCALE)
+    offsets = np.where(np.abs(offsets) > bound,
+                       np.sign(offsets) * bound,
+                       offsets)
+
+    center = np.array([center_lat, center_lon])
+    positions = center + offsets.astype(np.float64) / SCALE
+
+    # Human walking speed varies, but typically 4-5 km/h = ~1.1-1.4 m/s.
+    # Shrink the longitude deltas by cos(lat) so a degree of longitude is
+    # worth what it actually is at this latitude, then one hypot over the
+    # whole walk gives segment distances in meters
+    dlon_m = deltas[:, 1] * np.cos(np.deg2rad(positions[:, 0]))
+    distances = np.hypot(deltas[:, 0], dlon_m) * 111320.0
+    elapsed = np.cumsum(np.maximum(1, (distances / 1.2).astype(np.int64)))
+
+    # Elevation as a bounded random walk between 0 and 200m
+    elevations = np.clip(
+        _RNG.uniform(0, 100) + np.cumsum(_RNG.uniform(-2, 2, num_points)),
+        0, 200)
+
+    # Box into point dicts once at the end
+    return [
+        {
+            'lat': float(lat),
+            'lon': float(lon),
+            'timestamp': start_time + timedelta(seconds=int(secs)),
+            'elevation': float(ele)
+        }
+        for (lat, lon), secs, ele in zip(positions, elapsed, elevations)
+    ]
+
+@njit(cache=True)
+def _walk_and_interp(indptr, indices, coords, start_idx, edges_to_traverse, seed):
+    """Random-walk the CSR graph and interpolate points along each edge.
+
+    Runs entirely in nopython mode; returns flat lat/lon/elevation
+    arrays plus cumulative seconds since the start of the walk.
+    """
+    np.random.seed(seed)
+
+    # Random walk, avoiding the last 10 nodes when possible (ring buffer)
+    path = np.empty(edges_to_traverse + 1, dtype=np.int64)
+    path[0] = start_idx
+    recent = np.full(10, -1, dtype=np.int64)
+    recent[0] = start_idx
+    recent_pos = 1
+    path_len = 1
+    current = start_idx
+
+    for _ in range(edges_to_traverse):
+        base = indptr[current]
+        degree = indptr[current + 1] - base
+        if degree == 0:
+            break  # No neighbors, we're stuck
+
+        # Count neighbors not visited recently, then pick uniformly
+        # among them; fall back to any neighbor
+        fresh = 0
+        for j in range(degree):
+            cand = indices[base + j]
+            seen = False
+            for r in recent:
+                if r == cand:
+                    seen = True
+                    break
+            if not seen:
+                fresh += 1
+
+        if fresh > 0:
+            k = np.random.randint(0, fresh)
+            for j in range(degree):
+                cand = indices[base + j]
+                seen = False
+                for r in recent:
+                    if r == cand:
+                        seen = True
+                        break
+                if not seen:
+                    if k == 0:
+                        current = cand
+                        break
+                    k -= 1
         else:
-            elevation = points[-1]['elevation'] + random.uniform(-2, 2)  # Small elevation changes
-            elevation = max(0, min(200, elevation))  # Keep between 0 and 200m
-        
-        points.append({
-            'lat': current_lat,
-            'lon': current_lon,
-            'timestamp': current_time,
-            'elevation': elevation
-        })
-    
-    return points
+            current = indices[base + np.random.randint(0, degree)]
 
-def generate_realistic_walk(city_name, 
-                           length_km=5, 
+        path[path_len] = current
+        path_len += 1
+        recent[recent_pos % 10] = current
+        recent_pos += 1
+
+    # Size the output: a point every ~5 meters along each edge
+    total_points = 0
+    for i in range(path_len - 1):
+        a, b = path[i], path[i + 1]
+        dlat = coords[b, 0] - coords[a, 0]
+        dlon = (coords[b, 1] - coords[a, 1]) * math.cos(math.radians(coords[a, 0]))
+        dist_meters = math.sqrt(dlat * dlat + dlon * dlon) * 111320.0
+        total_points += max(5, int(dist_meters / 5))
+
+    lats = np.empty(total_points)
+    lons = np.empty(total_points)
+    elevations = np.empty(total_points)
+    seconds = np.empty(total_points, dtype=np.int64)
+
+    pos = 0
+    elapsed = 0
+    elevation = np.random.uniform(0, 100)
+
+    for i in range(path_len - 1):
+        a, b = path[i], path[i + 1]
+        dlat = coords[b, 0] - coords[a, 0]
+        dlon = coords[b, 1] - coords[a, 1]
+        dlon_m = dlon * math.cos(math.radians(coords[a, 0]))
+        dist_meters = math.sqrt(dlat * dlat + dlon_m * dlon_m) * 111320.0
+        num_points = max(5, int(dist_meters / 5))
+        step_seconds = int((dist_meters / num_points) / 1.2)  # ~1.2 m/s
+
+        for j in range(num_points):
+            fraction = j / num_points
+            lats[pos] = coords[a, 0] + fraction * dlat + np.random.uniform(-0.00001, 0.00001)
+            lons[pos] = coords[a, 1] + fraction * dlon + np.random.uniform(-0.00001, 0.00001)
+            elapsed += step_seconds
+            elevation += np.random.uniform(-0.5, 0.5)
+            if elevation < 0.0:
+                elevation = 0.0
+            elif elevation > 200.0:
+                elevation = 200.0
+            elevations[pos] = elevation
+            seconds[pos] = elapsed
+            pos += 1
+
+    return lats, lons, elevations, seconds
+
+def generate_realistic_walk(G,
+                           length_km=5,
                            starting_point=None,
-                           start_time=None,
-                           network_type='walk'):
+                           start_time=None):
     """
-    Generate a realistic walk along the street network of a city.
-    
+    Generate a realistic walk along a prebuilt street network graph.
+
     Parameters:
     -----------
-    city_name : str
-        Name of the city for the walk
+    G : networkx.MultiDiGraph
+        Street network from ox.graph_from_place, fetched once by the
+        caller and shared across walks
     length_km : float
         Approximate length of the walk in kilometers
     starting_point : tuple, optional
         (lat, lon) of the starting point. If None, a random point is chosen.
     start_time : datetime, optional
         Starting time for the track. If None, a random recent time is chosen.
-    network_type : str
-        Type of street network to use ('walk', 'drive', etc.)
-        
-    Returns:
-    --------
-    points : list of dict
-        List of points with lat, lon, time, and elevation
+
+    Yields:
+    -------
+    point : dict
+        Points with lat, lon, time, and elevation, produced one at a
+        time so arbitrarily long walks never materialize in memory
     """
-    print(f"Generating a {length_km}km walk in {city_name}...")
-    
-    # Get the street network
-    G = ox.graph_from_place(city_name, network_type=network_type)
-    
+    print(f"Generating a {length_km}km walk...")
+
+    # Flatten the graph's adjacency into CSR arrays once; each walk step
+    # then becomes two indptr reads and an indices slice instead of a
+    # NetworkX dict-of-dicts traversal
+    nodes = list(G.nodes)
+    node_pos = {node: i for i, node in enumerate(nodes)}
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    flat_neighbors = []
+    for i, node in enumerate(nodes):
+        flat_neighbors.extend(node_pos[n] for n in G.neighbors(node))
+        indptr[i + 1] = len(flat_neighbors)
+    indices = np.asarray(flat_neighbors, dtype=np.int64)
+    coords = np.array([[G.nodes[n]['y'], G.nodes[n]['x']] for n in nodes])
+
     # Choose a random starting node if not provided
     if starting_point is None:
         # Pick a random node
-        nodes = list(G.nodes)
-        start_node = random.choice(nodes)
-        start_y, start_x = G.nodes[start_node]['y'], G.nodes[start_node]['x']
+        start_idx = int(_RNG.integers(len(nodes)))
     else:
         # Find the nearest node to the provided starting point
         start_y, start_x = starting_point
-        start_node = ox.distance.nearest_nodes(G, start_x, start_y)
-    
+        start_idx = node_pos[ox.distance.nearest_nodes(G, start_x, start_y)]
+
     # Calculate how many nodes we need to visit for the desired length
-    # Average edge length in OSM is around 100-200 meters, so we estimate 
+    # Average edge length in OSM is around 100-200 meters, so we estimate
     # the number of edges we should traverse
     edges_to_traverse = int(length_km * 1000 / 150)  # 150m average edge length
-    
-    # Perform a random walk on the graph
-    current_node = start_node
-    path_nodes = [current_node]
-    
-    for _ in range(edges_to_traverse):
-        # Get neighbors of current node
-        neighbors = list(G.neighbors(current_node))
-        if not neighbors:
-            break  # No neighbors, we're stuck
-        
-        # Pick a random neighbor that hasn't been visited recently (if possible)
-        recent_nodes = path_nodes[-10:] if len(path_nodes) > 10 else path_nodes
-        new_neighbors = [n for n in neighbors if n not in recent_nodes]
-        
-        if new_neighbors:
-            next_node = random.choice(new_neighbors)
-        else:
-            next_node = random.choice(neighbors)  # Fall back to any neighbor
-        
-        path_nodes.append(next_node)
-        current_node = next_node
-    
-    # Get the coordinates for each node in the path
-    path_coords = [(G.nodes[node]['y'], G.nodes[node]['x']) for node in path_nodes]
-    
-    # Generate a more detailed path by adding points between nodes
-    detailed_path = []
-    
+
     if start_time is None:
         start_time = datetime.now() - timedelta(days=random.randint(1, 30))
-    
-    current_time = start_time
-    current_elevation = random.uniform(0, 100)
-    
-    for i in range(len(path_coords) - 1):
-        start_lat, start_lon = path_coords[i]
-        end_lat, end_lon = path_coords[i + 1]
-        
-        # Calculate distance between nodes (simplified)
-        dist = ((end_lat - start_lat)**2 + (end_lon - start_lon)**2) ** 0.5
-        dist_meters = dist * 111000  # rough conversion to meters
-        
-        # Determine number of points to generate between nodes
-        # More points for longer segments
-        num_points = max(5, int(dist_meters / 5))  # A point every ~5 meters
-        
-        for j in range(num_points):
-            # Interpolate between nodes
-            fraction = j / num_points
-            lat = start_lat + fraction * (end_lat - start_lat)
-            lon = start_lon + fraction * (end_lon - start_lon)
-            
-            # Add some small random noise for realism
-            lat += random.uniform(-0.00001, 0.00001)
-            lon += random.uniform(-0.00001, 0.00001)
-            
-            # Increment time (walking at ~1.2 m/s on average)
-            segment_dist = dist_meters / num_points
-            time_increment = timedelta(seconds=int(segment_dist / 1.2))
-            current_time += time_increment
-            
-            # Change elevation gradually
-            current_elevation += random.uniform(-0.5, 0.5)
-            current_elevation = max(0, min(200, current_elevation))
-            
-            detailed_path.append({
-                'lat': lat,
-                'lon': lon,
-                'timestamp': current_time,
-                'elevation': current_elevation
-            })
-    
-    return detailed_path
+
+    # The walk and the per-edge interpolation both run inside one
+    # JIT-compiled kernel; only the dict boxing stays in Python
+    lats, lons, elevations, seconds = _walk_and_interp(
+        indptr, indices, coords, start_idx, edges_to_traverse,
+        int(_RNG.integers(2**31 - 1)))
+
+    for lat, lon, ele, secs in zip(lats, lons, elevations, seconds):
+        yield {
+            'lat': float(lat),
+            'lon': float(lon),
+            'timestamp': start_time + timedelta(seconds=int(secs)),
+            'elevation': float(ele)
+        }
 
 def create_gpx_file(points, filename, track_name=None):
     """
     Create a GPX file from a list of points.
-    
+
     Parameters:
     -----------
-    points : list of dict
-        Points with lat, lon, timestamp, and elevation
+    points : iterable of dict
+        Points with lat, lon, timestamp, and elevation; may be a
+        generator, in which case points stream straight to disk
     filename : str
         Output GPX filename
     track_name : str, optional
         Name for the GPX track
     """
-    gpx = gpxpy.gpx.GPX()
-    
-    # Create track
-    gpx_track = gpxpy.gpx.GPXTrack()
-    gpx.tracks.append(gpx_track)
-    
-    if track_name:
-        gpx_track.name = track_name
-    
-    # Create segment
-    gpx_segment = gpxpy.gpx.GPXTrackSegment()
-    gpx_track.segments.append(gpx_segment)
-    
-    # Add points
-    for point in points:
-        gpx_point = gpxpy.gpx.GPXTrackPoint(
-            latitude=point['lat'],
-            longitude=point['lon'],
-            elevation=point['elevation'],
-            time=point['timestamp']
+    # lxml's incremental writer serializes each trkpt in C with proper
+    # escaping and never retains a DOM
+    num_points = 0
+    with etree.xmlfile(filename, encoding='utf-8') as xf:
+        xf.write_declaration()
+        with xf.element('gpx', version='1.1', creator='street-tracker',
+                        nsmap={None: 'http://www.topografix.com/GPX/1/1'}):
+            with xf.element('trk'):
+                if track_name:
+                    name_elem = etree.Element('name')
+                    name_elem.text = track_name
+                    xf.write(name_elem)
+                with xf.element('trkseg'):
+                    for point in points:
+                        trkpt = etree.Element(
+                            'trkpt',
+                            lat=f"{point['lat']:.7f}",
+                            lon=f"{point['lon']:.7f}")
+                        etree.SubElement(trkpt, 'ele').text = f"{point['elevation']:.2f}"
+                        etree.SubElement(trkpt, 'time').text = point['timestamp'].isoformat()
+                        xf.write(trkpt)
+                        num_points += 1
+
+    print(f"Created GPX file with {num_points} points: {filename}")
+
+# Street graph shared with worker processes, installed once per worker
+# by the pool initializer instead of being pickled per task
+_WORKER_G = None
+
+def _init_worker(G):
+    """Store the shared street graph in the worker process."""
+    global _WORKER_G
+    _WORKER_G = G
+
+def _generate_one_walk(task):
+    """Generate and write a single walk (runs in a worker process)."""
+    length_km, start_lat, start_lon, start_time, filename, track_name = task
+
+    try:
+        if _WORKER_G is None:
+            raise RuntimeError("street network unavailable")
+
+        # Try to generate a realistic walk; the points stream from
+        # the generator straight into the file
+        create_gpx_file(
+            points=generate_realistic_walk(
+                _WORKER_G,
+                length_km=length_km,
+                starting_point=(start_lat, start_lon),
+                start_time=start_time
+            ),
+            filename=filename,
+            track_name=track_name
+        )
+    except Exception as e:
+        print(f"Error generating realistic walk: {e}")
+        print("Falling back to random walk generation...")
+
+        # Fallback to simple random walk (rewrites any partial file)
+        create_gpx_file(
+            points=generate_random_walk(
+                center_lat=start_lat,
+                center_lon=start_lon,
+                min_points=int(length_km * 100),  # ~100 points per km
+                max_points=int(length_km * 200),  # ~200 points per km
+                max_distance=length_km / 100,  # Rough conversion to degrees
+                start_time=start_time
+            ),
+            filename=filename,
+            track_name=track_name
         )
-        gpx_segment.points.append(gpx_point)
-    
-    # Save to file
-    with open(filename, 'w') as f:
-        f.write(gpx.to_xml())
-    
-    print(f"Created GPX file with {len(points)} points: {filename}")
 
-def generate_test_walks(city_name="New York, USA", 
+def generate_test_walks(city_name="New York, USA",
                        output_dir="data/raw_walk_data", 
                        num_walks=5,
                        min_length_km=2, 
@@ -284,10 +409,8 @@ def generate_test_walks(city_name="New York, USA",
     # Generate a realistic starting point once and reuse it
     # This makes multiple walks start from somewhat the same area
     try:
-        # Get an approximate center for the city
-        gdf = ox.geocode_to_gdf(city_name)
-        center_point = gdf.geometry.centroid.iloc[0]
-        center_lat, center_lon = center_point.y, center_point.x
+        # Get an approximate center for the city (memoized + disk cache)
+        center_lat, center_lon = _city_centroid(city_name)
     except Exception:
         # Fallback to hardcoded coordinates for New York
         if "new york" in city_name.lower():
@@ -296,54 +419,46 @@ def generate_test_walks(city_name="New York, USA",
             # Generic fallback
             center_lat, center_lon = 0, 0
             print(f"Could not geocode {city_name}, using default coordinates")
-    
+
+    # Download and simplify the street network once; every walk below
+    # shares the same graph
+    try:
+        G = ox.graph_from_place(city_name, network_type='walk')
+    except Exception as e:
+        print(f"Could not download street network for {city_name}: {e}")
+        G = None
+
+    tasks = []
     for i in range(num_walks):
         # Random walk length
         length_km = random.uniform(min_length_km, max_length_km)
-        
+
         # Random start time within the last 3 months
         days_ago = random.randint(1, 90)
-        start_time = datetime.now() - timedelta(days=days_ago, 
+        start_time = datetime.now() - timedelta(days=days_ago,
                                                hours=random.randint(0, 23),
                                                minutes=random.randint(0, 59))
-        
+
         # Slightly vary the starting point for each walk
         start_lat = center_lat + random.uniform(-0.005, 0.005)
         start_lon = center_lon + random.uniform(-0.005, 0.005)
-        
-        try:
-            # Try to generate a realistic walk
-            points = generate_realistic_walk(
-                city_name=city_name,
-                length_km=length_km,
-                starting_point=(start_lat, start_lon),
-                start_time=start_time
-            )
-        except Exception as e:
-            print(f"Error generating realistic walk: {e}")
-            print("Falling back to random walk generation...")
-            
-            # Fallback to simple random walk
-            points = generate_random_walk(
-                center_lat=start_lat,
-                center_lon=start_lon,
-                min_points=int(length_km * 100),  # ~100 points per km
-                max_points=int(length_km * 200),  # ~200 points per km
-                max_distance=length_km / 100,  # Rough conversion to degrees
-                start_time=start_time
-            )
-        
+
         # Create a filename with date
         date_str = start_time.strftime("%Y-%m-%d")
         filename = os.path.join(output_dir, f"walk_{date_str}_{i+1}.gpx")
-        
-        # Create GPX file
-        create_gpx_file(
-            points=points,
-            filename=filename,
-            track_name=f"Walk {i+1} - {date_str} - {length_km:.1f}km"
-        )
-    
+        track_name = f"Walk {i+1} - {date_str} - {length_km:.1f}km"
+
+        tasks.append((length_km, start_lat, start_lon, start_time,
+                      filename, track_name))
+
+    # The walks are independent and each writes its own GPX file, so fan
+    # them out over a process pool; the graph is pickled once per worker
+    # by the initializer rather than once per task
+    with ProcessPoolExecutor(max_workers=os.cpu_count(),
+                             initializer=_init_worker,
+                             initargs=(G,)) as executor:
+        list(executor.map(_generate_one_walk, tasks))
+
     print(f"Generated {num_walks} test walks in {output_dir}")
 
 if __name__ == "__main__":
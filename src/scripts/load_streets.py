@@ -4,12 +4,48 @@ Load street network data for a given city using OSMnx.
 """
 import os
 import geopandas as gpd
+import numpy as np
 import osmnx as ox
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from shapely.geometry import LineString
 
-# OSMnx configuration 
+# OSMnx configuration
 # Now handled using individual settings rather than the config() function
+ox.settings.use_cache = True
+
+def _streets_from_graph(G):
+    """Build the slim streets GeoDataFrame straight from the edge data.
+
+    graph_to_gdfs materializes every OSM tag into columns that are
+    immediately thrown away; pulling just name/highway/length/geometry
+    out of G.edges skips that allocation and the dtype inference pass.
+    Edges without a stored geometry get a straight line between their
+    nodes.
+    """
+    names, highways, lengths, geoms = [], [], [], []
+    nodes = G.nodes
+    for u, v, d in G.edges(data=True):
+        names.append(d.get('name') or 'Unknown')
+        highways.append(d.get('highway'))
+        lengths.append(d.get('length', 0.0))
+        geom = d.get('geometry')
+        if geom is None:
+            geom = LineString([(nodes[u]['x'], nodes[u]['y']),
+                               (nodes[v]['x'], nodes[v]['y'])])
+        geoms.append(geom)
+
+    return gpd.GeoDataFrame(
+        {'name': names, 'highway': highways,
+         'length': np.asarray(lengths, dtype=np.float32)},
+        geometry=geoms, crs="EPSG:4326")
+
+def _init_runtime_columns(streets_gdf):
+    """(Re)initialize per-run coverage state; never persisted in the cache."""
+    streets_gdf['street_id'] = np.arange(len(streets_gdf), dtype=np.int32)
+    streets_gdf['covered'] = False
+    streets_gdf['coverage_percent'] = np.float32(0.0)
+    return streets_gdf
 
 def load_area_streets(area_name, custom_bbox=None, network_type='drive'):
     """
@@ -25,22 +61,11 @@ def load_area_streets(area_name, custom_bbox=None, network_type='drive'):
         else:
             # Get network from place name
             G = ox.graph_from_place(area_name, network_type=network_type)
-        
+
         # Convert to GeoDataFrame
-        streets_gdf = ox.graph_to_gdfs(G, nodes=False, edges=True)
-        
-        # Clean up the dataframe
-        # Keep only necessary columns
-        if 'name' in streets_gdf.columns:
-            streets_gdf = streets_gdf[['name', 'highway', 'length', 'geometry']]
-        else:
-            streets_gdf = streets_gdf[['highway', 'length', 'geometry']]
-            streets_gdf['name'] = 'Unknown'
-        
-        # Fill NaN values in name
-        streets_gdf['name'] = streets_gdf['name'].fillna('Unknown')
+        streets_gdf = _streets_from_graph(G)
         streets_gdf['area'] = area_name  # Add area name for reference
-        
+
         return streets_gdf
     
     except Exception as e:
@@ -65,12 +90,23 @@ def load_streets(city_name=None, custom_bbox=None, network_type='drive'):
     geopandas.GeoDataFrame
         GeoDataFrame containing street data
     """
-    cache_filename = os.path.join("data", "NYC_metro_streets.geojson")
-    
+    cache_filename = os.path.join("data", "NYC_metro_streets.parquet")
+    legacy_cache = os.path.join("data", "NYC_metro_streets.geojson")
+
     # Check if we have a cached version
     if os.path.exists(cache_filename):
         print(f"Loading streets from cache: {cache_filename}")
-        return gpd.read_file(cache_filename)
+        return _init_runtime_columns(gpd.read_parquet(cache_filename))
+
+    if os.path.exists(legacy_cache):
+        # One-shot migration of the old GeoJSON cache to Parquet; the
+        # runtime coverage columns are dropped rather than carried over
+        print(f"Migrating legacy cache {legacy_cache} to {cache_filename}")
+        streets_gdf = gpd.read_file(legacy_cache)
+        streets_gdf = streets_gdf.drop(
+            columns=['street_id', 'covered', 'coverage_percent'], errors='ignore')
+        streets_gdf.to_parquet(cache_filename)
+        return _init_runtime_columns(streets_gdf)
     
     # Define areas to load
     areas = [
@@ -83,35 +119,48 @@ def load_streets(city_name=None, custom_bbox=None, network_type='drive'):
         "Hoboken, New Jersey, USA"
     ]
     
-    print("Downloading street networks for NYC metro area...")
-    all_streets = []
-    
-    for area in areas:
-        print(f"Loading streets for {area}...")
-        streets_gdf = load_area_streets(area, network_type=network_type)
-        if streets_gdf is not None:
-            all_streets.append(streets_gdf)
-    
-    if not all_streets:
-        print("No street networks could be loaded")
+    print("Downloading street network for NYC metro area...")
+
+    try:
+        # Geocode the borough polygons concurrently (network-bound) and
+        # union them, so the whole metro network comes from one Overpass
+        # query and one simplification pass instead of seven overlapping
+        # ones with duplicated boundary edges
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            borough_polys = list(executor.map(
+                lambda area: ox.geocode_to_gdf(area).geometry.iloc[0], areas))
+
+        boroughs = gpd.GeoDataFrame({'area': areas}, geometry=borough_polys,
+                                    crs="EPSG:4326")
+        G = ox.graph_from_polygon(boroughs.geometry.unary_union,
+                                  network_type=network_type)
+
+        # Convert to GeoDataFrame
+        streets_gdf = _streets_from_graph(G)
+
+        # Tag each edge with the borough it falls in via one spatial join
+        joined = gpd.sjoin(streets_gdf[['geometry']], boroughs,
+                           how='left', predicate='intersects')
+        joined = joined[~joined.index.duplicated(keep='first')]
+        streets_gdf['area'] = joined['area'].fillna('Unknown')
+
+    except Exception as e:
+        print(f"Error loading street network for NYC metro area: {e}")
         return gpd.GeoDataFrame(geometry=[], crs="EPSG:4326")
-    
-    # Combine all street networks
-    streets_gdf = pd.concat(all_streets, ignore_index=True)
-    
-    # Create a unique ID for each street segment
-    streets_gdf['street_id'] = streets_gdf.index
-    
-    # Initialize coverage columns
-    streets_gdf['covered'] = False
-    streets_gdf['coverage_percent'] = 0.0
-    
-    # Save to file
+
+    # Shrink the repetitive string columns with dictionary-encoded
+    # categoricals; lengths are already float32 from _streets_from_graph
+    streets_gdf['name'] = streets_gdf['name'].astype('category')
+    streets_gdf['highway'] = streets_gdf['highway'].astype('category')
+    streets_gdf['area'] = streets_gdf['area'].astype('category')
+
+    # Save to file before adding the runtime coverage columns, so mutable
+    # per-run state never inflates the cache
     os.makedirs(os.path.dirname(cache_filename), exist_ok=True)
-    streets_gdf.to_file(cache_filename, driver="GeoJSON")
+    streets_gdf.to_parquet(cache_filename)
     print(f"Saved combined street network to {cache_filename}")
-    
-    return streets_gdf
+
+    return _init_runtime_columns(streets_gdf)
 
 
 if __name__ == "__main__":
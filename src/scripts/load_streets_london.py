@@ -7,8 +7,38 @@ import geopandas as gpd
 import osmnx as ox
 import networkx as nx
 from shapely.geometry import LineString
+import numpy as np
 import pandas as pd
 
+def _streets_from_graph(G):
+    """Build the slim streets GeoDataFrame straight from the edge data.
+
+    graph_to_gdfs materializes every OSM tag into columns that are
+    immediately thrown away; pulling just name/highway/geometry out of
+    G.edges skips that allocation and the dtype inference pass. Edges
+    without a stored geometry get a straight line between their nodes.
+    """
+    names, highways, geoms = [], [], []
+    nodes = G.nodes
+    for u, v, d in G.edges(data=True):
+        names.append(d.get('name') or 'Unknown')
+        highways.append(d.get('highway'))
+        geom = d.get('geometry')
+        if geom is None:
+            geom = LineString([(nodes[u]['x'], nodes[u]['y']),
+                               (nodes[v]['x'], nodes[v]['y'])])
+        geoms.append(geom)
+
+    return gpd.GeoDataFrame({'name': names, 'highway': highways},
+                            geometry=geoms, crs="EPSG:4326")
+
+def _init_runtime_columns(streets):
+    """(Re)initialize per-run coverage state; never persisted in the cache."""
+    streets['street_id'] = np.arange(len(streets), dtype=np.int32)
+    streets['covered'] = False
+    streets['coverage_percent'] = np.float32(0.0)
+    return streets
+
 def load_streets(use_cache=True):
     """
     Load the street network for Greater London.
@@ -23,11 +53,22 @@ def load_streets(use_cache=True):
     geopandas.GeoDataFrame
         Street network with columns for geometry and street properties
     """
-    cache_file = os.path.join("data", "London_streets.geojson")
+    cache_file = os.path.join("data", "London_streets.parquet")
+    legacy_cache = os.path.join("data", "London_streets.geojson")
     
     if use_cache and os.path.exists(cache_file):
         print(f"Loading streets from cache: {cache_file}")
-        return gpd.read_file(cache_file)
+        return _init_runtime_columns(gpd.read_parquet(cache_file))
+
+    if use_cache and os.path.exists(legacy_cache):
+        # One-shot migration of the old GeoJSON cache to Parquet; the
+        # runtime coverage columns are dropped rather than carried over
+        print(f"Migrating legacy cache {legacy_cache} to {cache_file}")
+        streets = gpd.read_file(legacy_cache)
+        streets = streets.drop(columns=['street_id', 'covered', 'coverage_percent'],
+                               errors='ignore')
+        streets.to_parquet(cache_file)
+        return _init_runtime_columns(streets)
     
     print("Downloading Greater London street network from OpenStreetMap...")
     
@@ -40,34 +81,21 @@ def load_streets(use_cache=True):
         )
         
         print("Converting network to GeoDataFrame...")
-        # Convert to GeoDataFrame
-        streets = ox.graph_to_gdfs(G, nodes=False)
-        
-        # Keep only necessary columns
-        if 'name' in streets.columns:
-            streets = streets[['name', 'highway', 'geometry']]
-        else:
-            streets = streets[['highway', 'geometry']]
-            streets['name'] = 'Unknown'
-        
-        # Fill NaN values in name
-        streets['name'] = streets['name'].fillna('Unknown')
-        
-        # Create a unique ID for each street
-        streets['street_id'] = range(len(streets))
-        
-        # Initialize coverage columns
-        streets['covered'] = False
-        streets['coverage_percent'] = 0.0
-        
+        streets = _streets_from_graph(G)
+
+        # Dictionary-encode the repetitive string columns
+        streets['name'] = streets['name'].astype('category')
+        streets['highway'] = streets['highway'].astype('category')
+
         # Create cache directory if it doesn't exist
         os.makedirs(os.path.dirname(cache_file), exist_ok=True)
-        
-        # Save to cache
+
+        # Save to cache before adding the runtime coverage columns, so
+        # mutable per-run state never inflates the file
         print(f"Saving streets to cache: {cache_file}")
-        streets.to_file(cache_file, driver='GeoJSON')
-        
-        return streets
+        streets.to_parquet(cache_file)
+
+        return _init_runtime_columns(streets)
         
     except Exception as e:
         print(f"Error loading Greater London network: {e}")
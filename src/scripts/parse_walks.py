@@ -4,12 +4,25 @@ Parse walking data from GPX and TCX files and convert to a GeoDataFrame for anal
 """
 import os
 import glob
+import hashlib
+import numpy as np
 import pandas as pd
 import geopandas as gpd
-from shapely.geometry import Point, LineString
+import shapely
 import warnings
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-import xml.etree.ElementTree as ET
+from functools import partial
+from lxml import etree
+from pathlib import Path
+
+# Parsed-points cache, keyed by file content hash so renames and
+# re-downloads of identical files still hit
+CACHE_DIR = Path('.cache')
+
+# XML namespaces used by the streaming parsers
+GPX_NS = 'http://www.topografix.com/GPX/1/1'
+TCX_NS = 'http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2'
 
 # Try to import gpxpy for GPX parsing
 try:
@@ -29,64 +42,74 @@ except ImportError:
     warnings.warn("fitparse not installed. FIT file parsing will not be available.")
 
 
+def _points_soa(lats, lons, times, elevations=None):
+    """Pack parsed track data into a struct-of-arrays dict.
+
+    Four flat numpy arrays instead of one ~300-byte Python dict per GPS
+    point; downstream geometry construction consumes the coordinate
+    arrays directly.
+    """
+    soa = {
+        'lat': np.asarray(lats, dtype=np.float64),
+        'lon': np.asarray(lons, dtype=np.float64),
+        'time': np.asarray(times, dtype=object),
+    }
+    if elevations is not None:
+        soa['elevation'] = np.asarray(
+            [np.nan if e is None else e for e in elevations],
+            dtype=np.float64)
+    return soa
+
+
 def parse_gpx(gpx_file):
-    """Parse a GPX file and return a list of points with timestamps."""
-    points = []
-    
+    """Parse a GPX file and return a struct-of-arrays of points."""
+    lats, lons, times, elevations = [], [], [], []
+
     if GPXPY_AVAILABLE:
         with open(gpx_file, 'r') as f:
             gpx = gpxpy.parse(f)
-            
+
             for track in gpx.tracks:
                 for segment in track.segments:
                     for point in segment.points:
-                        points.append({
-                            'lat': point.latitude,
-                            'lon': point.longitude,
-                            'timestamp': point.time,
-                            'elevation': point.elevation,
-                            'source_file': os.path.basename(gpx_file)
-                        })
+                        lats.append(point.latitude)
+                        lons.append(point.longitude)
+                        times.append(point.time)
+                        elevations.append(point.elevation)
     else:
-        # Basic parsing if gpxpy is not available
-        tree = ET.parse(gpx_file)
-        root = tree.getroot()
-        
-        for track in root.findall('.//default:trkpt', namespaces):
-            lat = float(track.get('lat'))
-            lon = float(track.get('lon'))
-            
-            time_elem = track.find('default:time', namespaces)
-            timestamp = datetime.fromisoformat(time_elem.text.replace('Z', '+00:00')) if time_elem is not None else None
-            
-            ele_elem = track.find('default:ele', namespaces)
-            elevation = float(ele_elem.text) if ele_elem is not None else None
-            
-            points.append({
-                'lat': lat,
-                'lon': lon,
-                'timestamp': timestamp,
-                'elevation': elevation,
-                'source_file': os.path.basename(gpx_file)
-            })
-    
-    return points
+        # Basic parsing if gpxpy is not available: stream the file with
+        # iterparse and free each trackpoint as soon as it has been read
+        for _, trkpt in etree.iterparse(gpx_file, tag=f'{{{GPX_NS}}}trkpt'):
+            lats.append(float(trkpt.get('lat')))
+            lons.append(float(trkpt.get('lon')))
+
+            time_elem = trkpt.find(f'{{{GPX_NS}}}time')
+            times.append(datetime.fromisoformat(time_elem.text.replace('Z', '+00:00')) if time_elem is not None else None)
+
+            ele_elem = trkpt.find(f'{{{GPX_NS}}}ele')
+            elevations.append(float(ele_elem.text) if ele_elem is not None else None)
+
+            trkpt.clear()
+            while trkpt.getprevious() is not None:
+                del trkpt.getparent()[0]
+
+    return _points_soa(lats, lons, times, elevations)
 
 
 def parse_fit(fit_file):
-    """Parse a FIT file and return a list of points with timestamps."""
+    """Parse a FIT file and return a struct-of-arrays of points."""
     if not FITPARSE_AVAILABLE:
         warnings.warn(f"Cannot parse FIT file {fit_file}. fitparse not installed.")
-        return []
-    
-    points = []
-    
+        return _points_soa([], [], [], [])
+
+    lats, lons, times, elevations = [], [], [], []
+
     try:
         fitfile = FitFile(fit_file)
-        
+
         for record in fitfile.get_messages('record'):
             point = {}
-            
+
             # Get all data from this record
             for data in record:
                 if data.name == 'position_lat' and data.value is not None:
@@ -94,76 +117,117 @@ def parse_fit(fit_file):
                 elif data.name == 'position_long' and data.value is not None:
                     point['lon'] = data.value * (180 / 2**31)
                 elif data.name == 'timestamp' and data.value is not None:
-                    point['timestamp'] = data.value
+                    point['time'] = data.value
                 elif data.name == 'altitude' and data.value is not None:
                     point['elevation'] = data.value
-            
+
             if 'lat' in point and 'lon' in point:
-                point['source_file'] = os.path.basename(fit_file)
-                points.append(point)
+                lats.append(point['lat'])
+                lons.append(point['lon'])
+                times.append(point.get('time'))
+                elevations.append(point.get('elevation'))
     except Exception as e:
         warnings.warn(f"Error parsing FIT file {fit_file}: {e}")
-    
-    return points
+
+    return _points_soa(lats, lons, times, elevations)
 
 
 def parse_tcx_file(tcx_file):
     """
-    Parse a TCX file and return a list of points with timestamps.
+    Parse a TCX file and return a struct-of-arrays of points.
     """
-    tree = ET.parse(tcx_file)
-    root = tree.getroot()
-    
-    # TCX uses a namespace, so we need to handle that
-    ns = {'ns': 'http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2'}
-    
-    points = []
-    
-    # Find all trackpoints
-    trackpoints = root.findall('.//ns:Trackpoint', ns)
-    
-    for trackpoint in trackpoints:
-        position = trackpoint.find('.//ns:Position', ns)
-        time_elem = trackpoint.find('ns:Time', ns)
-        
+    lats, lons, times = [], [], []
+
+    # Stream the file with iterparse instead of materializing the whole
+    # DOM; each trackpoint subtree is freed as soon as it has been read,
+    # so memory stays constant regardless of file size
+    for _, trackpoint in etree.iterparse(tcx_file,
+                                         tag=f'{{{TCX_NS}}}Trackpoint'):
+        position = trackpoint.find(f'.//{{{TCX_NS}}}Position')
+        time_elem = trackpoint.find(f'{{{TCX_NS}}}Time')
+
         if position is not None and time_elem is not None:
-            lat = float(position.find('ns:LatitudeDegrees', ns).text)
-            lon = float(position.find('ns:LongitudeDegrees', ns).text)
-            time = datetime.fromisoformat(time_elem.text.replace('Z', '+00:00'))
-            
-            points.append({
-                'lat': lat,
-                'lon': lon,
-                'time': time
-            })
-    
+            lats.append(float(position.find(f'{{{TCX_NS}}}LatitudeDegrees').text))
+            lons.append(float(position.find(f'{{{TCX_NS}}}LongitudeDegrees').text))
+            times.append(datetime.fromisoformat(time_elem.text.replace('Z', '+00:00')))
+
+        trackpoint.clear()
+        while trackpoint.getprevious() is not None:
+            del trackpoint.getparent()[0]
+
+    return _points_soa(lats, lons, times)
+
+
+def _parse_with_cache(parser, path):
+    """Run one file through the on-disk parse cache.
+
+    The cache key is a blake2b hash of the file's bytes, so unchanged
+    files skip XML/FIT parsing entirely on re-runs; any cache trouble
+    just falls back to parsing.
+    """
+    try:
+        with open(path, 'rb') as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+        cache_file = CACHE_DIR / f"{digest}.parquet"
+        if cache_file.exists():
+            df = pd.read_parquet(cache_file)
+            points = {col: df[col].to_numpy() for col in df.columns}
+            if 'time' in df.columns and pd.api.types.is_datetime64_any_dtype(df['time']):
+                # Parquet round-trips the times as a timestamp column;
+                # box them back into datetime objects (NaT back to None)
+                # so a cache hit returns the same shapes as a fresh parse
+                times = df['time'].to_numpy(dtype=object)
+                times[pd.isna(times)] = None
+                points['time'] = times
+            return points
+    except Exception as e:
+        # A corrupt or truncated cache file surfaces as pyarrow's own
+        # exception types rather than OSError; whatever went wrong,
+        # degrade to a plain re-parse instead of wedging the pipeline
+        # on a damaged .cache entry
+        warnings.warn(f"Could not read parse cache for {path}: {e}")
+        return parser(path)
+
+    points = parser(path)
+    if points['lat'].size:
+        try:
+            CACHE_DIR.mkdir(exist_ok=True)
+            pd.DataFrame(points).to_parquet(cache_file)
+        except (OSError, ValueError) as e:
+            warnings.warn(f"Could not cache parsed points for {path}: {e}")
     return points
 
 
 def create_linestring_from_points(points, source_file):
     """
-    Create a LineString from a list of points and return a GeoJSON feature.
+    Create a LineString from a struct-of-arrays of points and return a
+    GeoJSON feature.
     """
-    if not points:
-        return None
-        
-    # Sort points by timestamp if available
-    if 'time' in points[0]:
-        points = sorted(points, key=lambda x: x['time'])
-    
-    # Create line coordinates
-    line_coords = [(p['lon'], p['lat']) for p in points]
-    
-    if len(line_coords) < 2:
+    if points is None or points['lat'].size < 2:
         return None
-    
-    # Create LineString
-    line = LineString(line_coords)
-    
+
+    lats = points['lat']
+    lons = points['lon']
+    times = points['time']
+    have_times = times.size > 0 and times[0] is not None
+
+    # Sort points by timestamp, but only when every point has one —
+    # GPX/FIT files may omit the occasional timestamp, and sorting the
+    # object array would compare None against datetime and raise; such
+    # files keep their file order
+    if have_times and all(t is not None for t in times):
+        order = np.argsort(times)
+        lats = lats[order]
+        lons = lons[order]
+        times = times[order]
+
+    # Create LineString straight from the coordinate arrays
+    line = shapely.linestrings(np.column_stack([lons, lats]))
+
     # Get start and end times if available
-    start_time = points[0]['time'].isoformat() if 'time' in points[0] else None
-    end_time = points[-1]['time'].isoformat() if 'time' in points[-1] else None
-    
+    start_time = times[0].isoformat() if have_times else None
+    end_time = times[-1].isoformat() if have_times and times[-1] is not None else None
+
     return {
         'geometry': line,
         'start_time': start_time,
@@ -195,26 +259,31 @@ def parse_walks(data_dir, output_file):
     
     print(f"Found {len(gpx_files)} GPX files and {len(tcx_files)} TCX files")
     
+    # Each file parse is independent and CPU-bound, so fan the three
+    # file lists out across cores; the parsers are top-level functions
+    # returning plain point dicts, which pickle cheaply
+    with ProcessPoolExecutor() as executor:
+        gpx_points = list(executor.map(partial(_parse_with_cache, parse_gpx),
+                                       gpx_files))
+        tcx_points = list(executor.map(partial(_parse_with_cache, parse_tcx_file),
+                                       tcx_files))
+        fit_points = list(executor.map(partial(_parse_with_cache, parse_fit),
+                                       fit_files))
+
     walks = []
-    
-    # Process GPX files
-    for gpx_file in gpx_files:
-        points = parse_gpx(gpx_file)
+
+    # Build the LineStrings in the parent process
+    for gpx_file, points in zip(gpx_files, gpx_points):
         walk = create_linestring_from_points(points, os.path.basename(gpx_file))
         if walk:
             walks.append(walk)
-    
-    # Process TCX files
-    for tcx_file in tcx_files:
-        points = parse_tcx_file(tcx_file)
-        if points:  # Only process if we got valid points
-            walk = create_linestring_from_points(points, os.path.basename(tcx_file))
-            if walk:
-                walks.append(walk)
-    
-    # Process FIT files
-    for fit_file in fit_files:
-        points = parse_fit(fit_file)
+
+    for tcx_file, points in zip(tcx_files, tcx_points):
+        walk = create_linestring_from_points(points, os.path.basename(tcx_file))
+        if walk:
+            walks.append(walk)
+
+    for fit_file, points in zip(fit_files, fit_points):
         walk = create_linestring_from_points(points, os.path.basename(fit_file))
         if walk:
             walks.append(walk)
@@ -231,8 +300,12 @@ def parse_walks(data_dir, output_file):
     
     # Save to file
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    gdf.to_file(output_file, driver='GeoJSON')
-    
+    gdf.to_file(output_file, driver='GeoJSON', engine='pyogrio')
+
+    # GeoParquet sibling alongside the GeoJSON; downstream steps that
+    # re-read the walks (e.g. analyze_patterns) load it much faster
+    gdf.to_parquet(Path(output_file).with_suffix('.parquet'))
+
     print(f"Saved {len(walks)} walks to {output_file}")
     return gdf
 
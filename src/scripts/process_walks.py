@@ -25,7 +25,7 @@ def main():
     
     # Save processed walks
     walks_file = Path(PROCESSED_DATA_DIR) / "processed_walks.geojson"
-    walks_gdf.to_file(walks_file, driver='GeoJSON')
+    walks_gdf.to_file(walks_file, driver='GeoJSON', engine='pyogrio')
     print(f"Saved {len(walks_gdf)} walks to {walks_file}")
     
     # Process each city
@@ -36,20 +36,23 @@ def main():
         streets_file = Path(PROCESSED_DATA_DIR) / f"{city}_streets.geojson"
         if streets_file.exists():
             print(f"Loading street network from {streets_file}")
-            streets_gdf = gpd.read_file(streets_file)
+            streets_gdf = gpd.read_file(streets_file, engine='pyogrio')
         else:
             print(f"Downloading street network for {city}")
-            bbox = CITY_PARAMS[city]['bbox']
+            bbox = CITY_PARAMS[city].bbox
             streets_gdf = ox.graph_to_gdfs(
                 ox.graph_from_bbox(
                     bbox[1], bbox[3], bbox[0], bbox[2],
                     network_type='drive'
                 )
             )[1]
-            streets_gdf.to_file(streets_file, driver='GeoJSON')
+            streets_gdf.to_file(streets_file, driver='GeoJSON', engine='pyogrio')
         
-        # Filter walks for this city
-        city_walks = walks_gdf[walks_gdf.geometry.intersects(streets_gdf.unary_union)]
+        # Filter walks for this city with a cheap bounding-box test;
+        # unioning the whole street network for a coarse filter is
+        # wasted work and the analysis rejects stray walks anyway
+        minx, miny, maxx, maxy = streets_gdf.total_bounds
+        city_walks = walks_gdf.cx[minx:maxx, miny:maxy]
         if city_walks.empty:
             print(f"No walks found in {city}")
             continue
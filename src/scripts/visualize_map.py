@@ -5,10 +5,35 @@ Create an interactive map visualization showing street coverage.
 import os
 import folium
 import geopandas as gpd
+import orjson
 import pandas as pd
+import shapely
 import matplotlib.colors as mcolors
 from folium.plugins import MarkerCluster
 
+def _geojson_layer_data(gdf, tolerance=1e-5, properties=()):
+    """Build a slim, pre-simplified GeoJSON dict for a folium layer.
+
+    __geo_interface__ serializes every column of the frame and keeps
+    full-resolution geometries, which balloons the embedded HTML for a
+    city network. This simplifies the geometries at roughly meter
+    precision, writes them with shapely's C GeoJSON writer, and keeps
+    only the property columns the layer actually styles or shows.
+    """
+    geoms = shapely.simplify(gdf.geometry.values, tolerance=tolerance,
+                             preserve_topology=True)
+    geom_dicts = [orjson.loads(g) for g in shapely.to_geojson(geoms)]
+    columns = {name: gdf[name].tolist() for name in properties}
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': geom,
+            'properties': {name: columns[name][i] for name in properties}
+        }
+        for i, geom in enumerate(geom_dicts)
+    ]
+    return {'type': 'FeatureCollection', 'features': features}
+
 def default_street_style(feature):
     """Default style function for streets based on coverage."""
     covered = feature['properties']['covered']
@@ -97,7 +122,9 @@ def create_map(walks_gdf, streets_gdf, output_file, timeline_data=None, style_fu
     if not streets_gdf.empty:
         print("Adding streets to map...")
         streets_layer = folium.GeoJson(
-            streets_gdf.__geo_interface__,
+            _geojson_layer_data(
+                streets_gdf,
+                properties=('street_id', 'coverage_percent', 'covered')),
             name="Streets",
             style_function=style_function or default_street_style,
             tooltip=folium.GeoJsonTooltip(
@@ -120,7 +147,7 @@ def create_map(walks_gdf, streets_gdf, output_file, timeline_data=None, style_fu
     if not walks_gdf.empty:
         print("Adding walks to map...")
         walks_layer = folium.GeoJson(
-            walks_gdf.__geo_interface__,
+            _geojson_layer_data(walks_gdf),
             name="Walks",
             style_function=lambda x: {
                 'color': '#3388ff',
@@ -161,7 +188,8 @@ def create_map(walks_gdf, streets_gdf, output_file, timeline_data=None, style_fu
         # Add activities as lines
         if not activities.empty:
             activities_layer = folium.GeoJson(
-                activities.__geo_interface__,
+                _geojson_layer_data(
+                    activities, properties=('activity_type', 'distance')),
                 name="Timeline Activities",
                 style_function=lambda x: {
                     'color': '#ff0000',
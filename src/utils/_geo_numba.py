@@ -0,0 +1,24 @@
+"""
+Numba kernels for the numeric core of the path-metric computations.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _compute_metrics(lengths, directs, durations):
+    """Speed and sinuosity for batches of paths.
+
+    Takes the per-path length, direct start-to-end distance and
+    duration arrays and returns (avg_speed, sinuosity), with the same
+    zero-duration / zero-direct guards as the scalar code.
+    """
+    n = lengths.size
+    avg_speed = np.zeros(n)
+    sinuosity = np.ones(n)
+    for i in prange(n):
+        if durations[i] > 0:
+            avg_speed[i] = lengths[i] / durations[i]
+        if directs[i] > 0:
+            sinuosity[i] = lengths[i] / directs[i]
+    return avg_speed, sinuosity
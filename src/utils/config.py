@@ -2,32 +2,75 @@
 Configuration settings for different cities.
 """
 
-CITY_PARAMS = {
-    'london': {
-        'buffer_distance': 8,  # meters
-        'max_walking_speed': 2.5,  # m/s (about 9 km/h)
-        'min_walking_speed': 0.2,  # m/s
-        'max_sinuosity': 3.0,  # for longer trips
-        'max_direct_distance': 8000,  # meters
-        'bbox': [-0.351, 51.38, 0.148, 51.669],  # [min_lon, min_lat, max_lon, max_lat]
-    },
-    'blacksburg': {
-        'buffer_distance': 10,  # meters
-        'max_walking_speed': 2.8,  # m/s
-        'min_walking_speed': 0.2,  # m/s
-        'max_sinuosity': 3.5,  # for longer trips
-        'max_direct_distance': 5000,  # meters
-        'bbox': [-80.5, 37.18, -80.38, 37.25],  # [min_lon, min_lat, max_lon, max_lat]
-    },
-    'mumbai': {
-        'buffer_distance': 6,  # meters
-        'max_walking_speed': 2.2,  # m/s
-        'min_walking_speed': 0.1,  # m/s
-        'max_sinuosity': 3.2,  # for longer trips
-        'max_direct_distance': 6000,  # meters
-        'bbox': [72.77, 18.89, 72.99, 19.28],  # [min_lon, min_lat, max_lon, max_lat]
-    }
-}
+import numpy as np
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Tuple
+from shapely.geometry import box
+from shapely.prepared import prep
+
+@dataclass(frozen=True, slots=True)
+class CityParams:
+    """Per-city tuning parameters.
+
+    Frozen with slots so parameter reads in hot filtering loops are
+    C-level attribute lookups and the records cannot be mutated from
+    afar. The derived bbox helpers are computed once at construction:
+    a shapely box and its prepared form for geometry predicates, and a
+    numpy array so point filters can run as four vectorized comparisons
+    instead of per-point Python ones.
+    """
+    buffer_distance: float  # meters
+    max_walking_speed: float  # m/s
+    min_walking_speed: float  # m/s
+    max_sinuosity: float
+    max_direct_distance: float  # meters
+    bbox: Tuple[float, float, float, float]  # (min_lon, min_lat, max_lon, max_lat)
+    bbox_polygon: object = field(init=False)
+    bbox_prepared: object = field(init=False)
+    bbox_np: np.ndarray = field(init=False)
+    bbox_min: np.ndarray = field(init=False)
+    bbox_max: np.ndarray = field(init=False)
+
+    def __post_init__(self):
+        polygon = box(*self.bbox)
+        object.__setattr__(self, 'bbox_polygon', polygon)
+        object.__setattr__(self, 'bbox_prepared', prep(polygon))
+        object.__setattr__(self, 'bbox_np', np.array(self.bbox))
+        # float32 corner arrays for mask-style filtering of large point
+        # sets: GPS precision fits comfortably in float32 and the
+        # smaller operands halve the memory traffic of the comparison
+        object.__setattr__(
+            self, 'bbox_min', np.array(self.bbox[:2], dtype=np.float32))
+        object.__setattr__(
+            self, 'bbox_max', np.array(self.bbox[2:], dtype=np.float32))
+
+CITY_PARAMS = MappingProxyType({
+    'london': CityParams(
+        buffer_distance=8,
+        max_walking_speed=2.5,  # about 9 km/h
+        min_walking_speed=0.2,
+        max_sinuosity=3.0,  # for longer trips
+        max_direct_distance=8000,
+        bbox=(-0.351, 51.38, 0.148, 51.669),
+    ),
+    'blacksburg': CityParams(
+        buffer_distance=10,
+        max_walking_speed=2.8,
+        min_walking_speed=0.2,
+        max_sinuosity=3.5,  # for longer trips
+        max_direct_distance=5000,
+        bbox=(-80.5, 37.18, -80.38, 37.25),
+    ),
+    'mumbai': CityParams(
+        buffer_distance=6,
+        max_walking_speed=2.2,
+        min_walking_speed=0.1,
+        max_sinuosity=3.2,  # for longer trips
+        max_direct_distance=6000,
+        bbox=(72.77, 18.89, 72.99, 19.28),
+    ),
+})
 
 # File paths
 DATA_DIR = 'data'
@@ -43,4 +86,4 @@ METRIC_CRS = 'EPSG:3857'   # Web Mercator
 # Analysis settings
 MIN_WALK_DURATION = 60  # seconds
 MIN_WALK_DISTANCE = 100  # meters
-GPS_ACCURACY = 10  # meters 
\ No newline at end of file
+GPS_ACCURACY = 10  # meters
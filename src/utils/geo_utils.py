@@ -3,13 +3,43 @@ Utility functions for geographic data processing.
 """
 
 import geopandas as gpd
+import numpy as np
+import shapely
 from shapely.geometry import LineString, Point
-from shapely.ops import transform
 import pyproj
+from pyproj.enums import TransformDirection
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 import pandas as pd
 from typing import List, Tuple, Dict, Optional
-from .config import DEFAULT_CRS, METRIC_CRS
+from .config import CITY_PARAMS, DEFAULT_CRS, METRIC_CRS
+from ._geo_numba import _compute_metrics
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=32)
+def _get_transformer(source_crs: str, target_crs: str) -> pyproj.Transformer:
+    """Return a cached Transformer for a CRS pair.
+
+    Building a Transformer is far more expensive than using one, so each
+    (source, target) pair pays the construction cost only once.
+    """
+    return pyproj.Transformer.from_crs(source_crs, target_crs, always_xy=True)
+
+@lru_cache(maxsize=32)
+def _crs_equal(source_crs: str, target_crs: str) -> bool:
+    """Whether two CRS identifiers describe the same CRS.
+
+    Cheap string equality first; otherwise parse both once (cached) so
+    semantically equal spellings like 'EPSG:4326' and 'epsg:4326' still
+    hit the no-op fast path.
+    """
+    if source_crs == target_crs:
+        return True
+    return (pyproj.CRS.from_user_input(source_crs)
+            == pyproj.CRS.from_user_input(target_crs))
 
 def calculate_path_metrics(path: gpd.GeoDataFrame, city: str) -> Optional[Dict]:
     """Calculate metrics for a walking path.
@@ -22,16 +52,23 @@ def calculate_path_metrics(path: gpd.GeoDataFrame, city: str) -> Optional[Dict]:
         Dictionary containing path metrics or None if calculation fails
     """
     try:
-        # Get start and end times
-        start_time = pd.to_datetime(path['start_time'].iloc[0])
-        end_time = pd.to_datetime(path['end_time'].iloc[-1])
+        # Get start and end times; the parsers already hand us datetime
+        # values (a datetime64 column yields Timestamps), so only pay
+        # pd.to_datetime's scalar string-parsing path when we must
+        start_time = path['start_time'].iloc[0]
+        end_time = path['end_time'].iloc[-1]
+        if not isinstance(start_time, datetime):
+            start_time = pd.to_datetime(start_time)
+            end_time = pd.to_datetime(end_time)
         duration = (end_time - start_time).total_seconds()
-        
-        # Get path geometry in metric projection
+
+        # Reproject the frame before extracting the shapely geometry —
+        # the geometry itself carries no CRS, so the old per-geometry
+        # check raised and the except swallowed it on every call
+        if path.crs != METRIC_CRS:
+            path = path.to_crs(METRIC_CRS)
         path_geom = path.geometry.iloc[0]
-        if path_geom.crs != METRIC_CRS:
-            path_geom = path_geom.to_crs(METRIC_CRS)
-            
+
         # Calculate distances
         path_distance = path_geom.length
         start_point = Point(path_geom.coords[0])
@@ -49,69 +86,253 @@ def calculate_path_metrics(path: gpd.GeoDataFrame, city: str) -> Optional[Dict]:
             'avg_speed': avg_speed,
             'sinuosity': sinuosity
         }
-    except Exception as e:
-        print(f"Error calculating path metrics: {e}")
+    except (KeyError, ValueError, AttributeError):
+        # Only the failures this function can actually produce — missing
+        # columns, unparseable timestamps, malformed geometry; anything
+        # else (MemoryError, KeyboardInterrupt, ...) should propagate
+        logger.exception("Error calculating path metrics")
         return None
 
+def calculate_all_path_metrics(paths_gdf: gpd.GeoDataFrame) -> pd.DataFrame:
+    """Calculate metrics for every path in one vectorized pass.
+
+    Args:
+        paths_gdf: GeoDataFrame of path geometries with 'start_time' and
+            'end_time' columns
+
+    Returns:
+        DataFrame indexed like paths_gdf with duration, path_distance,
+        direct_distance, avg_speed and sinuosity columns
+    """
+    # One CRS conversion and one length computation for the whole frame
+    gdf_m = paths_gdf.to_crs(METRIC_CRS)
+    lengths = gdf_m.length.to_numpy()
+
+    # First/last vertex of every geometry, sliced out of the flat
+    # coordinate array instead of touching each geometry in Python
+    geoms = gdf_m.geometry.values
+    coords = shapely.get_coordinates(geoms)
+    last = np.cumsum(shapely.get_num_coordinates(geoms)) - 1
+    first = np.concatenate(([0], last[:-1] + 1))
+    direct = np.hypot(coords[last, 0] - coords[first, 0],
+                      coords[last, 1] - coords[first, 1])
+
+    durations = (pd.to_datetime(paths_gdf['end_time'])
+                 - pd.to_datetime(paths_gdf['start_time'])
+                 ).dt.total_seconds().to_numpy()
+
+    # JIT kernel fuses both guarded divisions into one parallel pass
+    # over the arrays
+    avg_speed, sinuosity = _compute_metrics(lengths, direct, durations)
+
+    return pd.DataFrame({
+        'duration': durations,
+        'path_distance': lengths,
+        'direct_distance': direct,
+        'avg_speed': avg_speed,
+        'sinuosity': sinuosity
+    }, index=paths_gdf.index)
+
 def reproject_geometry(geom, source_crs: str, target_crs: str):
     """Reproject a geometry from one CRS to another.
-    
+
+    The transform direction is passed as a TransformDirection enum
+    rather than a string so pyproj skips its per-call string-to-enum
+    conversion; new call sites should do the same.
+
     Args:
         geom: Shapely geometry
         source_crs: Source coordinate reference system
         target_crs: Target coordinate reference system
-        
+
     Returns:
         Reprojected geometry
     """
-    project = pyproj.Transformer.from_crs(
-        source_crs,
-        target_crs,
-        always_xy=True
-    ).transform
-    return transform(project, geom)
-
-def create_buffer(geom, distance: float, crs: str = DEFAULT_CRS) -> gpd.GeoSeries:
+    # Reprojecting into the same CRS is a no-op; skip the coordinate
+    # walk entirely
+    if _crs_equal(source_crs, target_crs):
+        return geom
+
+    transformer = _get_transformer(source_crs, target_crs)
+    # Pull all coordinates out as one array, push them through pyproj in
+    # a single batched call and rebuild the geometry, instead of paying
+    # a Python callback per vertex via shapely.ops.transform
+    return shapely.transform(
+        geom, lambda coords: np.column_stack(
+            transformer.transform(coords[:, 0], coords[:, 1],
+                                  direction=TransformDirection.FORWARD)))
+
+def reproject_geometries(geoms, source_crs: str, target_crs: str,
+                         workers: int = 4) -> np.ndarray:
+    """Reproject an array of geometries across threads.
+
+    pyproj releases the GIL inside the batched Transformer.transform
+    call and transformers have been thread-safe since pyproj 3.1, so
+    independent chunks of the array can reproject in parallel.
+
+    Args:
+        geoms: Sequence or array of shapely geometries
+        source_crs: Source coordinate reference system
+        target_crs: Target coordinate reference system
+        workers: Number of threads to spread the chunks over
+
+    Returns:
+        Array of reprojected geometries
+    """
+    geoms = np.asarray(geoms, dtype=object)
+
+    # Not worth spinning up threads for a handful of geometries
+    if workers <= 1 or len(geoms) < 2 * workers:
+        return reproject_geometry(geoms, source_crs, target_crs)
+
+    chunks = np.array_split(geoms, workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda chunk: reproject_geometry(chunk, source_crs, target_crs),
+            chunks)
+    return np.concatenate(list(results))
+
+def create_buffer(geom, distance: float, crs: str = DEFAULT_CRS,
+                  validate: bool = False) -> gpd.GeoSeries:
     """Create a buffer around a geometry in meters.
-    
+
     Args:
         geom: Geometry to buffer
         distance: Buffer distance in meters
         crs: Coordinate reference system of the geometry
-        
+        validate: Repair the buffered geometry with make_valid; much
+            faster than the buffer(0) idiom when a valid result is
+            required downstream
+
     Returns:
         Buffered geometry in the original CRS
     """
     # Convert to metric CRS for buffering
     if crs != METRIC_CRS:
         geom = reproject_geometry(geom, crs, METRIC_CRS)
-    
+
     # Create buffer
     buffered = geom.buffer(distance)
-    
+
+    if validate:
+        buffered = shapely.make_valid(buffered)
+
     # Convert back to original CRS
     if crs != METRIC_CRS:
         buffered = reproject_geometry(buffered, METRIC_CRS, crs)
-    
+
+    return buffered
+
+def create_buffers(geoms, distance: float, crs: str = DEFAULT_CRS,
+                   validate: bool = False) -> np.ndarray:
+    """Buffer an array of geometries in meters in one vectorized pass.
+
+    Args:
+        geoms: Sequence or array of shapely geometries
+        distance: Buffer distance in meters
+        crs: Coordinate reference system of the geometries
+        validate: Repair the buffered geometries with make_valid
+
+    Returns:
+        Array of buffered geometries in the original CRS
+    """
+    # reproject_geometry and shapely.buffer both accept geometry arrays,
+    # so the whole batch shares one CRS round-trip and one GEOS loop
+    # instead of a create_buffer call per geometry
+    geoms = np.asarray(geoms, dtype=object)
+
+    if crs != METRIC_CRS:
+        geoms = reproject_geometry(geoms, crs, METRIC_CRS)
+
+    buffered = shapely.buffer(geoms, distance)
+
+    if validate:
+        buffered = shapely.make_valid(buffered)
+
+    if crs != METRIC_CRS:
+        buffered = reproject_geometry(buffered, METRIC_CRS, crs)
+
     return buffered
 
-def calculate_coverage(street_geom: LineString, walk_buffers: List[gpd.GeoSeries]) -> float:
+def filter_points_in_bbox(xy: np.ndarray, city: str) -> np.ndarray:
+    """Mask of which points fall inside a city's bounding box.
+
+    Args:
+        xy: (N, 2) array of lon/lat coordinates
+        city: City key into CITY_PARAMS
+
+    Returns:
+        Boolean array, True where the point lies inside the bbox
+    """
+    params = CITY_PARAMS[city]
+    # Two SIMD-friendly comparisons against the precomputed float32
+    # corners instead of four Python comparisons per point
+    return ((xy >= params.bbox_min).all(axis=1)
+            & (xy <= params.bbox_max).all(axis=1))
+
+def prepare_coverage_inputs(streets_gdf: gpd.GeoDataFrame,
+                            walks_gdf: gpd.GeoDataFrame) -> Tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
+    """Project both coverage layers to the metric CRS in one pass each.
+
+    calculate_coverage assumes its inputs are already in METRIC_CRS so
+    that the per-street loop is pure GEOS work; run the street and walk
+    layers through here once beforehand instead of reprojecting inside
+    the loop.
+
+    Args:
+        streets_gdf: GeoDataFrame containing street geometries
+        walks_gdf: GeoDataFrame containing walk geometries
+
+    Returns:
+        (streets_gdf, walks_gdf) both in METRIC_CRS
+    """
+    if streets_gdf.crs != METRIC_CRS:
+        streets_gdf = streets_gdf.to_crs(METRIC_CRS)
+    if walks_gdf.crs != METRIC_CRS:
+        walks_gdf = walks_gdf.to_crs(METRIC_CRS)
+    return streets_gdf, walks_gdf
+
+def calculate_coverage(street_geom: LineString, walk_buffers: List[gpd.GeoSeries],
+                       tree: Optional[shapely.STRtree] = None) -> float:
     """Calculate what percentage of a street is covered by walk buffers.
-    
+
+    Both the street and the buffers must already be in METRIC_CRS (see
+    prepare_coverage_inputs); no reprojection happens here.
+
     Args:
         street_geom: Street geometry
         walk_buffers: List of buffered walk geometries
-        
+        tree: Optional STRtree built over walk_buffers by the caller;
+            when given, only buffers whose envelope intersects the
+            street are unioned and intersected
+
     Returns:
         Coverage percentage (0-100)
     """
     if not walk_buffers:
         return 0.0
-        
-    # Combine all buffers
-    combined_buffer = walk_buffers[0]
-    for buffer in walk_buffers[1:]:
-        combined_buffer = combined_buffer.union(buffer)
+
+    # With a shared spatial index, a street that touches a handful of
+    # walks out of thousands only ever sees those few buffers
+    if tree is not None:
+        candidates = tree.query(street_geom, predicate='intersects')
+        if candidates.size == 0:
+            return 0.0
+        walk_buffers = np.asarray(walk_buffers, dtype=object)[candidates]
+
+    # Combine all buffers in one call; GEOS unions the batch with a
+    # cascaded tree internally, which is far cheaper than folding the
+    # list together one pairwise union at a time. For large batches,
+    # sort by x-min and union in chunks of ~150 so each partial union
+    # merges spatial neighbours and intermediate results stay small
+    if len(walk_buffers) > 200:
+        buffers = np.asarray(walk_buffers, dtype=object)
+        buffers = buffers[np.argsort(shapely.bounds(buffers)[:, 0])]
+        partials = [shapely.union_all(buffers[i:i + 150])
+                    for i in range(0, len(buffers), 150)]
+        combined_buffer = shapely.union_all(partials)
+    else:
+        combined_buffer = shapely.union_all(walk_buffers)
     
     # Calculate intersection
     intersection = street_geom.intersection(combined_buffer)